@@ -0,0 +1,195 @@
+"""
+Indicator Kernels for ETF Tracker
+Numba-compiled kernels for technical indicators and signal classification
+"""
+import numpy as np
+from etf_tracker.utils import njit, vectorize
+
+
+@njit(cache=True)
+def _ema_step(prev, value, alpha):
+    """Advance an exponential moving average (pandas ewm, adjust=False) by one bar"""
+    if prev != value:
+        prev = ((1.0 - alpha) * prev + alpha * value) / ((1.0 - alpha) + alpha)
+    return prev
+
+
+@njit(cache=True)
+def running_sma(close, window, out):
+    """
+    Simple moving average from a running sum, O(1) work per bar
+
+    Args:
+        close (numpy.ndarray): Price array
+        window (int): Moving average window
+        out (numpy.ndarray): Output array, NaN until the window is full
+    """
+    total = 0.0
+    for i in range(close.shape[0]):
+        total += close[i]
+        if i >= window:
+            total -= close[i - window]
+        out[i] = total / window if i >= window - 1 else np.nan
+
+
+@njit(cache=True, error_model='numpy')
+def kd_loop(high, low, close, k_period, d_period, out_k, out_d):
+    """
+    Stochastic oscillator (KD) matching ``ta.momentum.StochasticOscillator``
+    
+    Args:
+        high, low, close (numpy.ndarray): Price arrays
+        k_period (int): Lookback period for K
+        d_period (int): Smoothing period for D
+        out_k, out_d (numpy.ndarray): Outputs for K and D, NaN until their windows are full
+    """
+    n = close.shape[0]
+
+    # Monotonic deques of indices for the window low/high
+    min_q = np.empty(n, dtype=np.int64)
+    max_q = np.empty(n, dtype=np.int64)
+    min_head = min_tail = 0
+    max_head = max_tail = 0
+
+    for i in range(n):
+        while min_tail > min_head and low[min_q[min_tail - 1]] >= low[i]:
+            min_tail -= 1
+        min_q[min_tail] = i
+        min_tail += 1
+        if min_q[min_head] <= i - k_period:
+            min_head += 1
+
+        while max_tail > max_head and high[max_q[max_tail - 1]] <= high[i]:
+            max_tail -= 1
+        max_q[max_tail] = i
+        max_tail += 1
+        if max_q[max_head] <= i - k_period:
+            max_head += 1
+
+        if i >= k_period - 1:
+            lowest = low[min_q[min_head]]
+            highest = high[max_q[max_head]]
+            out_k[i] = 100.0 * (close[i] - lowest) / (highest - lowest)
+        else:
+            out_k[i] = np.nan
+
+        if i >= k_period + d_period - 2:
+            total = 0.0
+            for j in range(d_period):
+                total += out_k[i - j]
+            out_d[i] = total / d_period
+        else:
+            out_d[i] = np.nan
+
+
+@njit(cache=True)
+def rsi_wilder_loop(close, period, out):
+    """
+    RSI with Wilder's smoothing matching ``ta.momentum.rsi``
+    
+    Args:
+        close (numpy.ndarray): Price array
+        period (int): RSI period
+        out (numpy.ndarray): Output array, NaN until the window is full
+    """
+    alpha = 1.0 / period
+    avg_up = avg_down = 0.0
+
+    for i in range(close.shape[0]):
+        if i > 0:
+            diff = close[i] - close[i - 1]
+            up = diff if diff > 0 else 0.0
+            down = -diff if diff < 0 else 0.0
+            avg_up = _ema_step(avg_up, up, alpha)
+            avg_down = _ema_step(avg_down, down, alpha)
+
+        if i < period - 1:
+            out[i] = np.nan
+        elif avg_down == 0:
+            out[i] = 100.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_up / avg_down)
+
+
+@njit(cache=True, error_model='numpy')
+def compute_indicators(high, low, close, ma_windows, k_period, d_period,
+                       fast, slow, signal, rsi_period,
+                       out_ma, out_k, out_d, out_macd, out_signal, out_hist, out_rsi):
+    """
+    Compute SMAs, KD, MACD and RSI over the price arrays
+
+    SMAs, KD and RSI are delegated to running_sma, kd_loop and
+    rsi_wilder_loop, so each indicator has a single implementation. Results
+    match the ``ta`` library: each indicator is NaN until its window is full,
+    EMAs follow pandas' ``ewm(adjust=False)`` and RSI uses Wilder's smoothing.
+    Inputs are expected to be free of NaNs.
+
+    Args:
+        high, low, close (numpy.ndarray): Price arrays of length n
+        ma_windows (numpy.ndarray): Moving average windows
+        k_period (int): Stochastic lookback period
+        d_period (int): Stochastic signal (D) smoothing period
+        fast, slow, signal (int): MACD periods
+        rsi_period (int): RSI period
+        out_ma (numpy.ndarray): Output of shape (len(ma_windows), n)
+        out_k, out_d, out_macd, out_signal, out_hist, out_rsi (numpy.ndarray):
+            Outputs of length n
+    """
+    n = close.shape[0]
+
+    for j in range(ma_windows.shape[0]):
+        running_sma(close, ma_windows[j], out_ma[j])
+
+    kd_loop(high, low, close, k_period, d_period, out_k, out_d)
+    rsi_wilder_loop(close, rsi_period, out_rsi)
+
+    # MACD
+    alpha_fast = 2.0 / (fast + 1)
+    alpha_slow = 2.0 / (slow + 1)
+    alpha_signal = 2.0 / (signal + 1)
+    ema_fast = ema_slow = ema_signal = 0.0
+
+    for i in range(n):
+        c = close[i]
+        if i == 0:
+            ema_fast = ema_slow = c
+        else:
+            ema_fast = _ema_step(ema_fast, c, alpha_fast)
+            ema_slow = _ema_step(ema_slow, c, alpha_slow)
+
+        if i >= slow - 1:
+            macd = ema_fast - ema_slow
+            if i == slow - 1:
+                ema_signal = macd
+            else:
+                ema_signal = _ema_step(ema_signal, macd, alpha_signal)
+            out_macd[i] = macd
+            if i >= slow + signal - 2:
+                out_signal[i] = ema_signal
+                out_hist[i] = macd - ema_signal
+            else:
+                out_signal[i] = np.nan
+                out_hist[i] = np.nan
+        else:
+            out_macd[i] = np.nan
+            out_signal[i] = np.nan
+            out_hist[i] = np.nan
+
+
+@vectorize(['int8(float32)', 'int8(float64)'], nopython=True, cache=True)
+def categorize_strength(strength):
+    """
+    Map a signal strength to a category code
+
+    Returns -2 (Strong Sell), -1 (Sell), 0 (Hold), 1 (Buy) or 2 (Strong Buy).
+    Strong thresholds are checked first, and NaN maps to Hold.
+    """
+    if strength >= 0.7:
+        return 2
+    if strength >= 0.3:
+        return 1
+    if strength <= -0.7:
+        return -2
+    if strength <= -0.3:
+        return -1
+    return 0
@@ -0,0 +1,151 @@
+"""
+Cache Module for ETF Tracker
+Provides a small on-disk cache for DataFrames so repeat requests skip the network
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+# Default cache location and freshness window (seconds)
+DEFAULT_CACHE_DIR = Path(os.getenv('ETF_CACHE_DIR', '.cache'))
+DEFAULT_TTL = int(os.getenv('ETF_CACHE_TTL', 6 * 60 * 60))
+
+# Taiwan market timezone and close; data fetched after the close is final for the day
+MARKET_TZ = ZoneInfo('Asia/Taipei')
+MARKET_CLOSE = (13, 30)
+
+
+def market_aware_ttl(ttl=DEFAULT_TTL, now=None):
+    """
+    Return the TTL to apply to cached market data
+
+    Before the close, cached data is fresh for ``ttl`` seconds. After the close
+    only entries written after the close are fresh, for the rest of the day
+    (up to one day).
+
+    Args:
+        ttl (int): TTL to use while the market is open
+        now (datetime, optional): Current time; naive values are taken as
+            Taipei time. Defaults to the current time in MARKET_TZ
+
+    Returns:
+        int: TTL in seconds
+    """
+    if now is None:
+        now = datetime.now(MARKET_TZ)
+    elif now.tzinfo is None:
+        now = now.replace(tzinfo=MARKET_TZ)
+    else:
+        now = now.astimezone(MARKET_TZ)
+    close = now.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    if now < close:
+        return ttl
+    return int(min((now - close).total_seconds(), 24 * 60 * 60))
+
+
+class FileCache:
+    """Parquet-backed on-disk cache for DataFrames with a time-to-live"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir (str or Path): Root directory for cache files
+            ttl (int): Default time-to-live in seconds
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(*parts):
+        """Build a stable cache key from the given parts"""
+        return hashlib.md5("|".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def path_for(self, namespace, name):
+        """Return the file path for a cache entry"""
+        return self.cache_dir / namespace / f"{name}.parquet"
+
+    def get(self, namespace, name, ttl=None):
+        """
+        Load a cached DataFrame if it exists and is still fresh
+
+        Args:
+            namespace (str): Sub-directory for the entry (e.g., ETF code)
+            name (str): Entry name
+            ttl (int, optional): TTL override in seconds
+
+        Returns:
+            pandas.DataFrame: Cached data, or None on a miss
+        """
+        path = self.path_for(namespace, name)
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            age = time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+        if age > ttl:
+            return None
+
+        # pandas is only needed once there is something to read
+        import pandas as pd
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            logger.warning("Could not read cache file %s: %s", path, e)
+            return None
+
+    def set(self, namespace, name, data):
+        """
+        Store a DataFrame in the cache
+
+        Args:
+            namespace (str): Sub-directory for the entry (e.g., ETF code)
+            name (str): Entry name
+            data (pandas.DataFrame): Data to store
+
+        Returns:
+            Path: Path to the cache file, or None if it could not be written
+        """
+        path = self.path_for(namespace, name)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial file
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            data.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            logger.warning("Could not write cache file %s: %s", path, e)
+            return None
+
+    def prune(self, namespace, ttl=None):
+        """
+        Delete entries in a namespace that are older than the TTL
+
+        Args:
+            namespace (str): Sub-directory to clean up (e.g., ETF code)
+            ttl (int, optional): TTL override in seconds
+
+        Returns:
+            int: Number of entries removed
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        removed = 0
+        for path in (self.cache_dir / namespace).glob('*.parquet'):
+            try:
+                if now - path.stat().st_mtime > ttl:
+                    path.unlink()
+                    removed += 1
+            except OSError as e:
+                logger.warning("Could not remove cache file %s: %s", path, e)
+        return removed
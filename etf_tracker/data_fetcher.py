@@ -3,17 +3,24 @@ ETF Data Fetcher Module for Taiwan ETFs
 Handles the fetching of ETF price data from Yahoo Finance
 """
 import os
+import time
+import random
+import threading
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import yfinance as yf
+from yfinance import shared as yf_shared
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from etf_tracker.cache import FileCache, market_aware_ttl
+from etf_tracker.rate_limiter import RateLimiter
+
 logger = logging.getLogger(__name__)
 
 # Taiwan ETF tickers mapping
@@ -26,29 +33,116 @@ ETF_TICKERS = {
 
 # Alternative format to try if primary format fails
 ALTERNATIVE_TICKERS = {
-    "0050": ["0050.TWO", "0050.TWO.TW", "0050.TWO"],
+    "0050": ["0050.TWO", "0050.TWO.TW"],
     "006208": ["6208.TWO", "6208.TWO.TW", "006208.TW"],
     "00878": ["0878.TWO", "0878.TWO.TW", "00878.TW"],
     "00929": ["0929.TWO", "0929.TWO.TW", "00929.TW"],
 }
 
+# Typical price levels used to generate sample data
+_BASE_PRICES = {
+    "0050": 150.0,    # Taiwan 50 ETF typically around this price
+    "006208": 20.0,
+    "00878": 70.0,
+    "00929": 25.0,
+}
+
+# On-disk cache for downloaded price history
+_CACHE = FileCache()
+
+# Shared HTTP session so every yfinance call reuses pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5)
+))
+
+# Throttle Yahoo downloads and retry failed ones after a randomized pause
+_RATE_LIMITER = RateLimiter(
+    max_concurrent=int(os.getenv('YAHOO_MAX_CONCURRENT', 5)),
+    requests_per_period=int(os.getenv('YAHOO_REQUESTS_PER_MINUTE', 10)),
+    period=60.0
+)
+DOWNLOAD_RETRIES = 2
+RETRY_DELAY_RANGE = (3.0, 5.0)
+
+def _download_error(ticker):
+    """
+    Get the error yfinance recorded for a ticker's last download
+    
+    yf.download() does not raise on network or rate-limit errors; it logs them,
+    stores them in yfinance.shared._ERRORS and returns an empty frame.
+    
+    Args:
+        ticker (str): Ticker symbol
+        
+    Returns:
+        str: Error message, or None if no error was recorded
+    """
+    errors = getattr(yf_shared, '_ERRORS', None) or {}
+    error = errors.get(ticker.upper())
+    return str(error) if error else None
+
+# Column order of a single-ticker download; batch frames are put in the same order
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+def _clean_frame(data):
+    """
+    Normalize a downloaded price frame so single and batch downloads cache identical data
+    
+    Args:
+        data (pandas.DataFrame): Price data for one ticker
+        
+    Returns:
+        pandas.DataFrame: Flat price columns in PRICE_COLUMNS order, without incomplete rows
+    """
+    # Newer yfinance versions add a ticker level even for one symbol
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    
+    columns = [col for col in PRICE_COLUMNS if col in data.columns]
+    if list(data.columns) != columns:
+        data = data[columns]
+    
+    # Clean up the data; skip the copy when the frame is already clean
+    if data.isna().to_numpy().any():
+        data = data.dropna()
+    return data
+
+def _is_permanent_error(error):
+    """Return whether a download error means the symbol has no data (retrying won't help)"""
+    return error is not None and 'delisted' in error.lower()
+
+# Downloads in progress, shared by concurrent callers asking for the same data
+_INFLIGHT = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# Short-lived in-process cache for fetch_latest_data to collapse bursts
+LATEST_DATA_TTL = 60
+_LATEST_CACHE = {}
+
 class ETFDataFetcher:
     """Class to fetch data for Taiwan ETFs from Yahoo Finance"""
     
-    def __init__(self, etf_code="0050"):
+    def __init__(self, etf_code="0050", session=_SESSION):
         """
         Initialize the data fetcher
         
         Args:
             etf_code (str): ETF code (e.g., "0050", "006208")
+            session (requests.Session): HTTP session for Yahoo requests. Defaults to the
+                module-level session so fetchers share pooled connections
         """
         self.etf_code = etf_code
         self.ticker = ETF_TICKERS.get(etf_code)
         self.alt_tickers = ALTERNATIVE_TICKERS.get(etf_code, [])
+        self._name = None
+        self.session = session
         
         if not self.ticker:
             raise ValueError(f"ETF code {etf_code} not supported. Available options: {list(ETF_TICKERS.keys())}")
-        logger.info(f"Initialized ETFDataFetcher for {etf_code} ({self.ticker})")
+        logger.info("Initialized ETFDataFetcher for %s (%s)", etf_code, self.ticker)
         
     def fetch_historical_data(self, period="1y", interval="1d"):
         """
@@ -61,22 +155,45 @@ class ETFDataFetcher:
         Returns:
             pandas.DataFrame: Historical price data
         """
-        logger.info(f"Fetching {period} data for {self.etf_code} at {interval} interval")
+        key = (self.etf_code, period, interval)
+        with _INFLIGHT_LOCK:
+            future = _INFLIGHT.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                _INFLIGHT[key] = future
         
-        # Try with primary ticker
-        data = self._try_download(self.ticker, period, interval)
+        # Another caller is already fetching this data, so wait for its result
+        if not owner:
+            logger.info("Waiting for in-flight fetch of %s data for %s", period, self.etf_code)
+            data = future.result()
+            return data.copy() if data is not None else None
         
-        # If primary ticker fails, try alternatives
-        if data is None and self.alt_tickers:
-            for alt_ticker in self.alt_tickers:
-                logger.info(f"Trying alternative ticker: {alt_ticker}")
-                data = self._try_download(alt_ticker, period, interval)
-                if data is not None:
-                    break
+        try:
+            data = self._fetch_historical_data(period, interval)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with _INFLIGHT_LOCK:
+                _INFLIGHT.pop(key, None)
+    
+    def _fetch_historical_data(self, period, interval):
+        """Fetch historical data, trying alternative tickers and sample data as fallbacks"""
+        logger.info("Fetching %s data for %s at %s interval", period, self.etf_code, interval)
+        
+        # Serve from the disk cache before going to the network
+        data = self._load_cached(self.ticker, period, interval)
+        
+        # Otherwise try the primary ticker, then the alternatives
+        if data is None:
+            data = self._download_first([self.ticker] + self.alt_tickers, period, interval)
         
         # If all attempts fail, use sample data
         if data is None:
-            logger.warning(f"Could not fetch data for {self.etf_code}. Using sample data instead.")
+            logger.warning("Could not fetch data for %s. Using sample data instead.", self.etf_code)
             data = self._generate_sample_data(period, interval)
         
         if data is not None:
@@ -85,26 +202,217 @@ class ETFDataFetcher:
         
         return data
     
-    def _try_download(self, ticker, period, interval):
-        """Try to download data for a specific ticker"""
-        try:
-            data = yf.download(
-                ticker,
-                period=period,
-                interval=interval,
-                progress=False
-            )
-            if data.empty:
-                logger.error(f"No data returned for {ticker}")
-                return None
-                
-            # Clean up the data
-            data = data.dropna()
+    def _download_first(self, tickers, period, interval):
+        """
+        Download the primary ticker, then race the alternatives if it fails
+        
+        The alternatives are downloaded concurrently, but the result is picked
+        by list order, so a faster but less preferred listing never wins over
+        an earlier one that also succeeded.
+        
+        Args:
+            tickers (list): Ticker symbols to try, primary first
+            period (str): Time period to fetch
+            interval (str): Data interval
+            
+        Returns:
+            pandas.DataFrame: Data from the first ticker that succeeded, or None
+        """
+        primary, alternatives = tickers[0], tickers[1:]
+        data = self._try_download(primary, period, interval)
+        if data is not None or not alternatives:
             return data
+        
+        with ThreadPoolExecutor(max_workers=len(alternatives)) as executor:
+            futures = [executor.submit(self._try_download, ticker, period, interval)
+                       for ticker in alternatives]
+            for ticker, future in zip(alternatives, futures):
+                data = future.result()
+                if data is not None:
+                    logger.info("Using alternative ticker: %s", ticker)
+                    return data
+        return None
+    
+    @classmethod
+    def fetch_many(cls, etf_codes, period="1y", interval="1d"):
+        """
+        Fetch historical price data for several ETFs with a single download
+        
+        Args:
+            etf_codes (list): ETF codes to fetch
+            period (str): Time period to fetch (e.g., "1y", "6mo", "1mo")
+            interval (str): Data interval (e.g., "1d", "1wk")
+            
+        Returns:
+            dict: Mapping of ETF code to pandas.DataFrame
+        """
+        fetchers = [cls(etf_code) for etf_code in etf_codes]
+        results = {}
+        
+        # Only download the ETFs that are not already cached
+        pending = []
+        for fetcher in fetchers:
+            cached = fetcher._load_cached(fetcher.ticker, period, interval)
+            if cached is not None:
+                cached['etf_code'] = fetcher.etf_code
+                results[fetcher.etf_code] = cached
+            else:
+                pending.append(fetcher)
+        
+        # Claim the rest so concurrent fetch_historical_data() calls wait for this download
+        futures, waiting = {}, []
+        with _INFLIGHT_LOCK:
+            for fetcher in pending:
+                key = (fetcher.etf_code, period, interval)
+                if key in _INFLIGHT:
+                    waiting.append((fetcher, _INFLIGHT[key]))
+                else:
+                    futures[fetcher.etf_code] = _INFLIGHT[key] = Future()
+        claimed = [fetcher for fetcher in pending if fetcher.etf_code in futures]
+        
+        try:
+            # yfinance returns flat columns for a single ticker, so that goes through the regular path
+            frames = cls._download_batch(claimed, period, interval) if len(claimed) > 1 else {}
+            for fetcher in claimed:
+                frame = frames.get(fetcher.etf_code)
+                if frame is None:
+                    # Fall back to retries, alternative tickers and sample data
+                    frame = fetcher._fetch_historical_data(period, interval)
+                else:
+                    _CACHE.set(fetcher.etf_code, fetcher._cache_name(fetcher.ticker, period, interval), frame)
+                    frame['etf_code'] = fetcher.etf_code
+                results[fetcher.etf_code] = frame
+                futures[fetcher.etf_code].set_result(frame)
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            with _INFLIGHT_LOCK:
+                for etf_code in futures:
+                    _INFLIGHT.pop((etf_code, period, interval), None)
+        
+        for fetcher, future in waiting:
+            logger.info("Waiting for in-flight fetch of %s data for %s", period, fetcher.etf_code)
+            data = future.result()
+            results[fetcher.etf_code] = data.copy() if data is not None else None
+        
+        return {fetcher.etf_code: results[fetcher.etf_code] for fetcher in fetchers}
+    
+    @staticmethod
+    def _download_batch(fetchers, period, interval):
+        """
+        Download several tickers in one request, validating each ticker's result
+        
+        Args:
+            fetchers (list): ETFDataFetcher instances whose primary tickers to download
+            period (str): Time period to fetch
+            interval (str): Data interval
             
+        Returns:
+            dict: Mapping of ETF code to cleaned DataFrame for the tickers that returned data
+        """
+        tickers = " ".join(fetcher.ticker for fetcher in fetchers)
+        logger.info("Fetching %s data for %s ETFs in one request", period, len(fetchers))
+        try:
+            with _RATE_LIMITER.limit():
+                data = yf.download(
+                    tickers,
+                    period=period,
+                    interval=interval,
+                    group_by='ticker',
+                    auto_adjust=False,
+                    threads=True,
+                    progress=False,
+                    session=_SESSION
+                )
         except Exception as e:
-            logger.error(f"Error fetching data for {ticker}: {e}")
+            _RATE_LIMITER.record_failure()
+            logger.error("Error fetching data for %s: %s", tickers, e)
+            return {}
+        
+        frames = {}
+        failed = False
+        for fetcher in fetchers:
+            frame = None
+            error = _download_error(fetcher.ticker)
+            if not data.empty and not error:
+                try:
+                    frame = _clean_frame(data.xs(fetcher.ticker, axis=1, level=0))
+                except KeyError:
+                    pass
+            
+            if frame is None or frame.empty:
+                logger.error("No data returned for %s: %s", fetcher.ticker, error or "empty result")
+                failed = failed or not _is_permanent_error(error)
+            else:
+                frames[fetcher.etf_code] = frame
+        
+        # Only a download that produced data for every ticker counts as a success
+        if failed:
+            _RATE_LIMITER.record_failure()
+        else:
+            _RATE_LIMITER.record_success()
+        return frames
+    
+    def _cache_name(self, ticker, period, interval):
+        """Return the cache entry name for a download"""
+        today = datetime.now().strftime('%Y%m%d')
+        key = FileCache.make_key(ticker, period, interval, today)
+        return f"{period}_{interval}_{today}_{key[:8]}"
+    
+    def _load_cached(self, ticker, period, interval):
+        """Load a previously downloaded ticker from the disk cache"""
+        cached = _CACHE.get(self.etf_code, self._cache_name(ticker, period, interval),
+                            ttl=market_aware_ttl(_CACHE.ttl))
+        if cached is None or cached.empty:
             return None
+        logger.info("Loaded %s data from cache", ticker)
+        return cached
+    
+    def _try_download(self, ticker, period, interval):
+        """Try to download data for a specific ticker, serving repeat requests from disk"""
+        cached = self._load_cached(ticker, period, interval)
+        if cached is not None:
+            return cached
+        
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            if attempt:
+                # Give Yahoo's throttling time to reset before retrying
+                time.sleep(random.uniform(*RETRY_DELAY_RANGE))
+                
+            try:
+                with _RATE_LIMITER.limit():
+                    data = yf.download(
+                        ticker,
+                        period=period,
+                        interval=interval,
+                        progress=False,
+                        group_by='column',
+                        auto_adjust=False,
+                        session=self.session
+                    )
+            except Exception as e:
+                _RATE_LIMITER.record_failure()
+                logger.error("Error fetching data for %s: %s", ticker, e)
+                continue
+            
+            error = _download_error(ticker)
+            if data.empty or error:
+                logger.error("No data returned for %s: %s", ticker, error or "empty result")
+                if _is_permanent_error(error):
+                    # Unknown or delisted symbol; not a sign of throttling
+                    return None
+                _RATE_LIMITER.record_failure()
+                continue
+            
+            _RATE_LIMITER.record_success()
+            data = _clean_frame(data)
+            _CACHE.set(self.etf_code, self._cache_name(ticker, period, interval), data)
+            return data
+        
+        return None
     
     def _generate_sample_data(self, period="1y", interval="1d"):
         """
@@ -133,72 +441,59 @@ class ETFDataFetcher:
         # Generate date range
         if interval == "1d":
             # Business days only (Mon-Fri)
-            date_range = pd.date_range(start=start_date, end=end_date, freq='B')
+            date_range = pd.bdate_range(start=start_date, end=end_date)
         else:
             # Simplify for other intervals
             date_range = pd.date_range(start=start_date, end=end_date, freq='D')
         
         # Base price depends on ETF type
-        if self.etf_code == "0050":
-            base_price = 150.0  # Taiwan 50 ETF typically around this price
-        elif self.etf_code == "006208":
-            base_price = 20.0
-        elif self.etf_code == "00878":
-            base_price = 70.0
-        elif self.etf_code == "00929":
-            base_price = 25.0
-        else:
-            base_price = 100.0
+        base_price = _BASE_PRICES.get(self.etf_code, 100.0)
         
         # Generate random price movements with trend and volatility
-        np.random.seed(42)  # For reproducibility
+        # A local generator keeps this reproducible without touching global RNG state
+        rng = np.random.default_rng(42)
+        
+        # Draw all normal and uniform noise in one pass each
+        n = len(date_range)
+        z = rng.standard_normal((n, 2))
+        u = rng.random((n, 2))
         
         # Add a slight upward trend and some volatility
-        daily_returns = np.random.normal(0.0002, 0.01, len(date_range))
+        daily_returns = 0.0002 + 0.01 * z[:, 0]
         
         # Calculate price series with cumulative returns
         price_series = base_price * (1 + np.cumsum(daily_returns))
         
         # Generate OHLC data with some realistic relationships
-        high_series = price_series * (1 + np.random.uniform(0, 0.02, len(date_range)))
-        low_series = price_series * (1 - np.random.uniform(0, 0.02, len(date_range)))
+        high_series = price_series * (1 + 0.02 * u[:, 0])
+        low_series = price_series * (1 - 0.02 * u[:, 1])
         
-        # Create separate open and close prices with reasonable relationships
-        open_series = []
-        close_series = []
+        # Open price is somewhat related to previous close
+        open_noise = 0.005 * z[:, 1]
+        open_series = np.empty(n, dtype=np.float64)
+        open_series[0] = base_price
+        open_series[1:] = price_series[:-1] * (1 + open_noise[1:])
+        close_series = price_series
         
-        for i in range(len(date_range)):
-            if i == 0:
-                open_price = base_price
-            else:
-                # Open price is somewhat related to previous close
-                open_price = close_series[i-1] * (1 + np.random.normal(0, 0.005))
-            
-            # Close price
-            close_price = price_series[i]
-            
-            # Ensure OHLC relationships make sense
-            high_price = max(high_series[i], open_price, close_price)
-            low_price = min(low_series[i], open_price, close_price)
-            
-            open_series.append(open_price)
-            close_series.append(close_price)
-            high_series[i] = high_price
-            low_series[i] = low_price
+        # Ensure OHLC relationships make sense (in place, no temporaries)
+        np.maximum(high_series, open_series, out=high_series)
+        np.maximum(high_series, close_series, out=high_series)
+        np.minimum(low_series, open_series, out=low_series)
+        np.minimum(low_series, close_series, out=low_series)
         
         # Generate random but increasing volume
-        volume = np.random.randint(50000, 5000000, len(date_range))
+        volume = rng.integers(50000, 5000000, n)
         
-        # Create DataFrame
+        # Create DataFrame column-wise from the arrays without a defensive copy
         data = pd.DataFrame({
             'Open': open_series,
             'High': high_series,
             'Low': low_series,
             'Close': close_series,
             'Volume': volume,
-        }, index=date_range)
+        }, index=date_range, copy=False)
         
-        logger.info(f"Generated sample data with {len(data)} rows for {self.etf_code}")
+        logger.info("Generated sample data with %s rows for %s", len(data), self.etf_code)
         return data
     
     def fetch_latest_data(self):
@@ -208,42 +503,32 @@ class ETFDataFetcher:
         Returns:
             dict: Latest price information
         """
+        cached = _LATEST_CACHE.get(self.etf_code)
+        if cached is not None and time.time() - cached[0] < LATEST_DATA_TTL:
+            return dict(cached[1])
+        
+        latest_data = self._fetch_latest_data()
+        _LATEST_CACHE[self.etf_code] = (time.time(), latest_data)
+        return dict(latest_data)
+    
+    def _fetch_latest_data(self):
+        """Fetch the latest data point from Yahoo Finance, falling back to sample data"""
         try:
-            ticker_data = yf.Ticker(self.ticker)
-            info = ticker_data.info
-            latest_data = {
-                'etf_code': self.etf_code,
-                'name': info.get('shortName'),
-                'price': info.get('regularMarketPrice', 0),
-                'change': info.get('regularMarketChangePercent', 0),
-                'volume': info.get('regularMarketVolume', 0),
-                'date': datetime.now().strftime('%Y-%m-%d'),
-            }
-            return latest_data
+            return self._latest_from_ticker(self.ticker)
         except Exception as e:
-            logger.error(f"Error fetching latest data for {self.ticker}: {e}")
+            logger.error("Error fetching latest data for %s: %s", self.ticker, e)
             
             # Try alternative tickers if primary fails
             if self.alt_tickers:
                 for alt_ticker in self.alt_tickers:
                     try:
-                        logger.info(f"Trying alternative ticker for latest data: {alt_ticker}")
-                        ticker_data = yf.Ticker(alt_ticker)
-                        info = ticker_data.info
-                        latest_data = {
-                            'etf_code': self.etf_code,
-                            'name': info.get('shortName'),
-                            'price': info.get('regularMarketPrice', 0),
-                            'change': info.get('regularMarketChangePercent', 0),
-                            'volume': info.get('regularMarketVolume', 0),
-                            'date': datetime.now().strftime('%Y-%m-%d'),
-                        }
-                        return latest_data
+                        logger.info("Trying alternative ticker for latest data: %s", alt_ticker)
+                        return self._latest_from_ticker(alt_ticker)
                     except:
                         continue
             
             # Generate sample latest data
-            logger.warning(f"Using sample latest data for {self.etf_code}")
+            logger.warning("Using sample latest data for %s", self.etf_code)
             sample_data = self._generate_sample_data(period="1mo")
             last_row = sample_data.iloc[-1]
             
@@ -258,32 +543,106 @@ class ETFDataFetcher:
             }
             return latest_data
     
-    def save_data_to_csv(self, data, file_path=None):
+    def _latest_from_ticker(self, ticker):
+        """Build latest price information for a ticker from its lightweight fast_info"""
+        fast_info = yf.Ticker(ticker, session=self.session).fast_info
+        price = fast_info['last_price']
+        previous_close = fast_info['previous_close']
+        change = ((price / previous_close) - 1) * 100 if previous_close else 0
+        return {
+            'etf_code': self.etf_code,
+            'name': self._get_name(ticker),
+            'price': price,
+            'change': change,
+            'volume': fast_info['last_volume'],
+            'date': datetime.now().strftime('%Y-%m-%d'),
+        }
+    
+    def _get_name(self, ticker):
+        """Return the ETF name, fetched once since it does not change"""
+        if self._name is None:
+            try:
+                self._name = yf.Ticker(ticker, session=self.session).info.get('shortName') or ''
+            except Exception as e:
+                logger.warning("Could not fetch name for %s: %s", ticker, e)
+                self._name = ''
+        return self._name or None
+    
+    def save_data(self, data, file_path=None, file_format='parquet', compression='snappy'):
         """
-        Save data to CSV file
+        Save data to a Parquet or CSV file
         
         Args:
             data (pandas.DataFrame): Data to save
             file_path (str, optional): File path to save to. If None, uses default naming.
+            file_format (str): "parquet" or "csv". Inferred from file_path's extension when it has one.
+            compression (str): Compression codec for Parquet files
             
         Returns:
             str: Path to saved file
         """
         if file_path is None:
             today = datetime.now().strftime('%Y-%m-%d')
-            file_path = f"etf_tracker/reports/{self.etf_code}_{today}.csv"
+            file_path = f"etf_tracker/reports/{self.etf_code}_{today}.{file_format}"
+        else:
+            extension = os.path.splitext(str(file_path))[1].lstrip('.').lower()
+            if extension in ('parquet', 'csv'):
+                file_format = extension
+        
+        if file_format not in ('parquet', 'csv'):
+            raise ValueError(f"Unsupported file format {file_format}. Available options: ['parquet', 'csv']")
             
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        data.to_csv(file_path)
-        logger.info(f"Data saved to {file_path}")
+        if file_format == 'csv':
+            data.to_csv(file_path)
+        else:
+            data.to_parquet(file_path, engine='pyarrow', compression=compression)
+        logger.info("Data saved to %s", file_path)
         return file_path
+    
+    def save_data_to_csv(self, data, file_path=None):
+        """
+        Save data to CSV file
+        
+        Args:
+            data (pandas.DataFrame): Data to save
+            file_path (str, optional): File path to save to. If None, uses default naming.
+            
+        Returns:
+            str: Path to saved file
+        """
+        return self.save_data(data, file_path, file_format='csv')
+
+@functools.lru_cache(maxsize=16)
+def get_fetcher(etf_code):
+    """
+    Return a shared ETFDataFetcher for an ETF code
+    
+    Args:
+        etf_code (str): ETF code (e.g., "0050", "006208")
+        
+    Returns:
+        ETFDataFetcher: Fetcher reused across calls for the same code
+    """
+    return ETFDataFetcher(etf_code)
 
+@functools.lru_cache(maxsize=1)
 def get_supported_etfs():
-    """Return the list of supported ETF codes"""
-    return list(ETF_TICKERS.keys())
+    """Return the supported ETF codes (a shared tuple, so callers cannot modify it)"""
+    return tuple(ETF_TICKERS)
+
+# Supported codes as a set for constant-time membership checks
+_SUPPORTED_ETF_SET = frozenset(ETF_TICKERS)
+
+def is_supported_etf(etf_code):
+    """Return whether an ETF code is supported"""
+    return etf_code in _SUPPORTED_ETF_SET
 
 # Testing functionality
 if __name__ == "__main__":
+    from etf_tracker.logging_config import configure_logging
+    configure_logging()
+    
     # Test for 0050
     fetcher = ETFDataFetcher("0050")
     data = fetcher.fetch_historical_data(period="3mo")
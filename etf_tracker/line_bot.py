@@ -4,6 +4,7 @@ Provides webhook handling and message sending capabilities using LINE Messaging
 """
 import os
 import json
+import hashlib
 import logging
 from flask import Flask, request, abort
 from linebot import LineBotApi, WebhookHandler
@@ -14,26 +15,35 @@ from linebot.models import (
 )
 from datetime import datetime
 import tempfile
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from etf_tracker.logging_config import configure_logging
+
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging at import so WSGI servers keep the bot's logs; this is a
+# no-op if the hosting process already configured logging
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
 
+# Worker pool for ETF requests so the webhook can return without waiting on Yahoo
+MAX_WORKERS = int(os.getenv('LINE_BOT_WORKERS', 4))
+request_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
 # LINE API credentials
 LINE_CHANNEL_ACCESS_TOKEN = os.getenv('LINE_CHANNEL_ACCESS_TOKEN', '')
 LINE_CHANNEL_SECRET = os.getenv('LINE_CHANNEL_SECRET', '')
 
+# LINE's multicast endpoint accepts at most this many recipients per call
+MULTICAST_LIMIT = 500
+
 # Check if LINE credentials are available
 LINE_AVAILABLE = bool(LINE_CHANNEL_ACCESS_TOKEN and LINE_CHANNEL_SECRET)
 
@@ -47,15 +57,60 @@ else:
     handler = None
     logger.warning("LINE credentials not found. LINE notifications will be disabled.")
 
-# Import other modules
-try:
-    from etf_tracker.data_fetcher import ETFDataFetcher, get_supported_etfs
-    from etf_tracker.strategy import ETFStrategy
-    from etf_tracker.plotter import ETFPlotter
-    MODULES_LOADED = True
-except ImportError as e:
-    logger.error(f"Error importing modules: {e}")
-    MODULES_LOADED = False
+# The analysis modules pull in pandas, numpy and matplotlib, so they are
+# imported on first use rather than when the webhook server starts
+def modules_available():
+    """
+    Import the analysis modules, returning whether they are available
+    
+    Returns:
+        bool: True if the modules could be imported
+    """
+    try:
+        import etf_tracker.data_fetcher
+        import etf_tracker.strategy
+        import etf_tracker.plotter
+        return True
+    except ImportError as e:
+        logger.error("Error importing modules: %s", e)
+        return False
+
+# Pre-fetch state so the cache is only warmed once per process
+_warm_started = False
+_warm_lock = threading.Lock()
+
+def _warm_etf(etf_code):
+    """Fetch one ETF so its history lands in the disk cache"""
+    from etf_tracker.data_fetcher import get_fetcher
+    
+    try:
+        get_fetcher(etf_code).fetch_historical_data()
+    except Exception as e:
+        logger.warning("Could not pre-fetch ETF %s: %s", etf_code, e)
+
+def warm_cache():
+    """Concurrently fetch all supported ETFs so first requests hit a warm cache"""
+    if not modules_available():
+        return
+    from etf_tracker.data_fetcher import get_supported_etfs
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_warm_etf, get_supported_etfs()))
+    logger.info("ETF data cache warmed")
+
+def start_cache_warmer():
+    """Warm the ETF data cache in a background thread, once per process"""
+    global _warm_started
+    with _warm_lock:
+        if _warm_started:
+            return
+        _warm_started = True
+    threading.Thread(target=warm_cache, name="etf-cache-warmer", daemon=True).start()
+
+@app.before_request
+def _warm_on_first_request():
+    """Start warming the cache when a WSGI server delivers the first request"""
+    start_cache_warmer()
 
 @app.route("/callback", methods=['POST'])
 def callback():
@@ -71,7 +126,7 @@ def callback():
     
     # Get request body as text
     body = request.get_data(as_text=True)
-    logger.info(f"Request body: {body}")
+    logger.info("Request body: %s", body)
     
     # Handle webhook verification
     try:
@@ -82,6 +137,34 @@ def callback():
         
     return 'OK'
 
+def _cmd_etf(user_id, args):
+    """Handle 'etf <code>' by analyzing the ETF in the background"""
+    if not args:
+        send_help_message(user_id)
+        return
+    if not modules_available():
+        send_text_message(user_id, "System is currently unavailable. Please try again later.")
+        return
+    request_executor.submit(handle_etf_request, user_id, args.split()[0])
+
+def _cmd_help(user_id, args):
+    """Handle 'help' by sending the list of commands"""
+    send_help_message(user_id)
+
+def _cmd_list(user_id, args):
+    """Handle 'list' by sending the supported ETFs"""
+    from etf_tracker.data_fetcher import get_supported_etfs
+    supported_etfs = get_supported_etfs()
+    etf_list = "\n".join([f"• {etf}" for etf in supported_etfs])
+    send_text_message(user_id, f"Supported ETFs:\n{etf_list}")
+
+# Text commands understood by the bot, keyed by their first word
+_COMMANDS = {
+    'etf': _cmd_etf,
+    'help': _cmd_help,
+    'list': _cmd_list,
+}
+
 # Only define this function if LINE is available
 if LINE_AVAILABLE:
     @handler.add(MessageEvent, message=TextMessage)
@@ -92,37 +175,20 @@ if LINE_AVAILABLE:
         text = event.message.text.strip().lower()
         user_id = event.source.user_id
         
-        logger.info(f"Received message from {user_id}: {text}")
-        
-        # Check if modules are loaded
-        if not MODULES_LOADED:
-            send_text_message(user_id, "System is currently unavailable. Please try again later.")
-            return
-        
-        # Handle ETF requests
-        if text.startswith('etf'):
-            parts = text.split()
-            if len(parts) >= 2:
-                etf_code = parts[1]
-                handle_etf_request(user_id, etf_code)
-            else:
-                send_help_message(user_id)
+        logger.info("Received message from %s: %s", user_id, text)
         
-        # Handle help request
-        elif text == 'help':
-            send_help_message(user_id)
-        
-        # Handle list request
-        elif text == 'list':
-            supported_etfs = get_supported_etfs()
-            etf_list = "\n".join([f"• {etf}" for etf in supported_etfs])
-            send_text_message(user_id, f"Supported ETFs:\n{etf_list}")
+        # Dispatch on the first word of the message
+        parts = text.split(maxsplit=1)
+        command = _COMMANDS.get(parts[0]) if parts else None
         
         # Handle unknown commands
-        else:
+        if command is None:
             send_text_message(user_id, 
                 "Welcome to ETF Tracker! Type 'help' to see available commands or 'etf 0050' to check 0050 ETF."
             )
+            return
+        
+        command(user_id, parts[1] if len(parts) > 1 else None)
 else:
     # Define a dummy handler for when LINE is not available
     def handle_text_message(event):
@@ -138,12 +204,15 @@ def handle_etf_request(user_id, etf_code):
         etf_code (str): ETF code (e.g., "0050")
     """
     if not LINE_AVAILABLE:
-        logger.warning(f"LINE API not configured, ETF request for {etf_code} skipped")
+        logger.warning("LINE API not configured, ETF request for %s skipped", etf_code)
         return
         
+    from etf_tracker.data_fetcher import get_fetcher
+    from etf_tracker.strategy import ETFStrategy
+    
     try:
         # Fetch and prepare ETF data
-        fetcher = ETFDataFetcher(etf_code)
+        fetcher = get_fetcher(etf_code)
         data = fetcher.fetch_historical_data()
         
         if data is None or data.empty:
@@ -162,8 +231,7 @@ def handle_etf_request(user_id, etf_code):
         signal_info = strategy.get_latest_signal(df_with_signals)
         
         # Generate summary plot
-        plotter = ETFPlotter(df_with_signals, etf_code)
-        image_path = plotter.plot_signal_summary()
+        image_path = get_summary_plot(etf_code, df_with_signals)
         
         # Send the results
         send_etf_analysis(user_id, etf_code, signal_info, image_path)
@@ -171,23 +239,61 @@ def handle_etf_request(user_id, etf_code):
     except ValueError as e:
         send_text_message(user_id, f"Error: {str(e)}")
     except Exception as e:
-        logger.error(f"Error processing ETF request for {etf_code}: {e}")
+        logger.error("Error processing ETF request for %s: %s", etf_code, e)
         send_text_message(user_id, "Sorry, an error occurred while processing your request.")
 
-def send_etf_analysis(user_id, etf_code, signal_info, image_path=None):
+def get_summary_plot(etf_code, df_with_signals):
     """
-    Send ETF analysis to the user
+    Return a summary chart for the data, rendering it only if this exact data
+    has not been plotted before
     
     Args:
-        user_id (str): LINE user ID
         etf_code (str): ETF code
-        signal_info (dict): Signal information
-        image_path (str): Path to the analysis image
+        df_with_signals (pandas.DataFrame): Data with indicators and signals
+        
+    Returns:
+        str: Path to the summary image
     """
-    if not LINE_AVAILABLE:
-        logger.warning("LINE API not configured, skipping message sending")
-        return
+    import pandas as pd
+    from etf_tracker.cache import DEFAULT_CACHE_DIR
+    from etf_tracker.plotter import ETFPlotter
+    
+    # Charts are keyed by a hash of the data they show
+    row_hashes = pd.util.hash_pandas_object(df_with_signals.tail(300), index=True)
+    key = hashlib.md5(row_hashes.values.tobytes()).hexdigest()
+    plot_dir = DEFAULT_CACHE_DIR / 'plots'
+    image_path = plot_dir / f"{etf_code}_{key}.png"
+    
+    if image_path.exists():
+        logger.info("Using cached summary plot %s", image_path)
+        return str(image_path)
+    
+    # The plotter renders to a temporary file and swaps it in, so concurrent
+    # requests never send a truncated image
+    plotter = ETFPlotter(df_with_signals, etf_code, output_dir=str(plot_dir))
+    plotter.plot_signal_summary(filepath=str(image_path))
+    
+    # Only the chart for the latest data is reused, so drop the older ones
+    for old_path in plot_dir.glob(f"{etf_code}_*.png"):
+        if old_path != image_path:
+            try:
+                old_path.unlink()
+            except OSError as e:
+                logger.warning("Could not remove old summary plot %s: %s", old_path, e)
+    
+    return str(image_path)
+
+def format_etf_analysis(etf_code, signal_info):
+    """
+    Format the ETF analysis text message
+    
+    Args:
+        etf_code (str): ETF code
+        signal_info (dict): Signal information
         
+    Returns:
+        str: Message text
+    """
     # Format date
     date_str = signal_info['date'].strftime('%Y-%m-%d') if hasattr(signal_info['date'], 'strftime') else signal_info['date']
     
@@ -201,9 +307,24 @@ def send_etf_analysis(user_id, etf_code, signal_info, image_path=None):
     message += f"• KD: K={signal_info['k_value']:.1f}, D={signal_info['d_value']:.1f}\n"
     message += f"• MACD: {signal_info['macd']:.3f}\n"
     message += f"• RSI: {signal_info['rsi']:.1f}\n"
+    return message
+
+def send_etf_analysis(user_id, etf_code, signal_info, image_path=None):
+    """
+    Send ETF analysis to the user
     
+    Args:
+        user_id (str): LINE user ID
+        etf_code (str): ETF code
+        signal_info (dict): Signal information
+        image_path (str): Path to the analysis image
+    """
+    if not LINE_AVAILABLE:
+        logger.warning("LINE API not configured, skipping message sending")
+        return
+        
     # Send text message
-    send_text_message(user_id, message)
+    send_text_message(user_id, format_etf_analysis(etf_code, signal_info))
     
     # Send image if available
     if image_path and os.path.exists(image_path):
@@ -243,14 +364,14 @@ def send_text_message(user_id, text):
         text (str): Message text
     """
     if not LINE_AVAILABLE:
-        logger.warning(f"LINE API not configured, would have sent: {text}")
+        logger.warning("LINE API not configured, would have sent: %s", text)
         return
         
     try:
         line_bot_api.push_message(user_id, TextSendMessage(text=text))
-        logger.info(f"Sent text message to {user_id}")
+        logger.info("Sent text message to %s", user_id)
     except Exception as e:
-        logger.error(f"Error sending message to {user_id}: {e}")
+        logger.error("Error sending message to %s: %s", user_id, e)
 
 def send_image_message(user_id, image_url):
     """
@@ -261,7 +382,7 @@ def send_image_message(user_id, image_url):
         image_url (str): URL of the image
     """
     if not LINE_AVAILABLE:
-        logger.warning(f"LINE API not configured, would have sent image: {image_url}")
+        logger.warning("LINE API not configured, would have sent image: %s", image_url)
         return
         
     try:
@@ -269,9 +390,29 @@ def send_image_message(user_id, image_url):
             user_id, 
             ImageSendMessage(original_content_url=image_url, preview_image_url=image_url)
         )
-        logger.info(f"Sent image message to {user_id}")
+        logger.info("Sent image message to %s", user_id)
     except Exception as e:
-        logger.error(f"Error sending image to {user_id}: {e}")
+        logger.error("Error sending image to %s: %s", user_id, e)
+
+def multicast_messages(user_ids, messages):
+    """
+    Send the same messages to many users with batched multicast calls
+    
+    Args:
+        user_ids (list): LINE user IDs
+        messages (list): LINE message objects (at most 5)
+    """
+    if not LINE_AVAILABLE:
+        logger.warning("LINE API not configured, multicast to %s users skipped", len(user_ids))
+        return
+        
+    for start in range(0, len(user_ids), MULTICAST_LIMIT):
+        chunk = user_ids[start:start + MULTICAST_LIMIT]
+        try:
+            line_bot_api.multicast(chunk, messages)
+            logger.info("Multicast %s messages to %s users", len(messages), len(chunk))
+        except Exception as e:
+            logger.error("Error multicasting to %s users: %s", len(chunk), e)
 
 def send_help_message(user_id):
     """
@@ -292,12 +433,15 @@ def send_help_message(user_id):
 """
     send_text_message(user_id, help_text)
 
-def broadcast_etf_report(etf_code, user_ids=None):
+def broadcast_etf_report(etf_codes, user_ids=None):
     """
-    Broadcast ETF analysis report to multiple users
+    Broadcast ETF analysis reports to multiple users
+    
+    Each report is delivered with LINE multicast calls of up to MULTICAST_LIMIT
+    recipients, never with one push per user.
     
     Args:
-        etf_code (str): ETF code to analyze
+        etf_codes (str or list): ETF code or list of ETF codes to analyze
         user_ids (list): List of LINE user IDs to send to. If None, uses registered users.
     """
     if not LINE_AVAILABLE:
@@ -308,41 +452,58 @@ def broadcast_etf_report(etf_code, user_ids=None):
         # In a real implementation, you would retrieve registered users from a database
         logger.warning("No user IDs provided for broadcast")
         return
+    
+    if isinstance(etf_codes, str):
+        etf_codes = [etf_codes]
+    user_ids = list(user_ids)
+    
+    if not modules_available():
+        logger.error("Analysis modules unavailable, broadcast skipped")
+        return
+    from etf_tracker.data_fetcher import ETFDataFetcher
+    from etf_tracker.strategy import ETFStrategy
         
     try:
-        # Fetch and analyze ETF data
-        fetcher = ETFDataFetcher(etf_code)
-        data = fetcher.fetch_historical_data()
-        
-        if data is None or data.empty:
-            logger.error(f"Could not fetch data for ETF {etf_code}")
-            return
+        # Fetch data for all ETFs with a single download
+        datasets = ETFDataFetcher.fetch_many(etf_codes)
+    except Exception as e:
+        logger.error("Error broadcasting ETF report: %s", e)
+        return
+    
+    for etf_code, data in datasets.items():
+        try:
+            if data is None or data.empty:
+                logger.error("Could not fetch data for ETF %s", etf_code)
+                continue
+                
+            # Calculate indicators and generate signals
+            strategy = ETFStrategy(data)
+            df_with_signals = strategy.generate_signals()
             
-        # Calculate indicators and generate signals
-        strategy = ETFStrategy(data)
-        df_with_signals = strategy.generate_signals()
-        
-        if df_with_signals is None:
-            logger.error(f"Could not analyze ETF {etf_code}")
-            return
+            if df_with_signals is None:
+                logger.error("Could not analyze ETF %s", etf_code)
+                continue
+                
+            # Get latest signal
+            signal_info = strategy.get_latest_signal(df_with_signals)
             
-        # Get latest signal
-        signal_info = strategy.get_latest_signal(df_with_signals)
-        
-        # Generate plot
-        plotter = ETFPlotter(df_with_signals, etf_code)
-        image_path = plotter.plot_signal_summary()
-        
-        # Send to each user
-        for user_id in user_ids:
-            send_etf_analysis(user_id, etf_code, signal_info, image_path)
+            # Generate plot
+            image_path = get_summary_plot(etf_code, df_with_signals)
             
-        logger.info(f"Broadcast ETF {etf_code} analysis to {len(user_ids)} users")
-        
-    except Exception as e:
-        logger.error(f"Error broadcasting ETF report: {e}")
+            # Build the messages once and send them to everyone in batches
+            messages = [TextSendMessage(text=format_etf_analysis(etf_code, signal_info))]
+            image_url = get_public_url_for_image(image_path) if image_path and os.path.exists(image_path) else None
+            if image_url:
+                messages.append(ImageSendMessage(original_content_url=image_url, preview_image_url=image_url))
+            multicast_messages(user_ids, messages)
+                
+            logger.info("Broadcast ETF %s analysis to %s users", etf_code, len(user_ids))
+            
+        except Exception as e:
+            logger.error("Error broadcasting ETF report for %s: %s", etf_code, e)
 
 if __name__ == "__main__":
     # For local development
+    start_cache_warmer()
     port = int(os.getenv('PORT', 5000))
     app.run(host='0.0.0.0', port=port) 
\ No newline at end of file
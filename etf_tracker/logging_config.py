@@ -0,0 +1,16 @@
+"""
+Logging Configuration for ETF Tracker
+Configures logging once from the application entry points
+"""
+import logging
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+def configure_logging(level=logging.INFO):
+    """
+    Configure the root logger for the application
+    
+    Args:
+        level (int): Logging level
+    """
+    logging.basicConfig(level=level, format=LOG_FORMAT)
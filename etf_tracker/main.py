@@ -6,19 +6,18 @@ import os
 import logging
 import argparse
 from datetime import datetime
-import schedule
-import time
-import json
+from apscheduler.schedulers.blocking import BlockingScheduler
+import shutil
+import threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Import local modules
+from etf_tracker.logging_config import configure_logging
+from etf_tracker.cache import FileCache, DEFAULT_CACHE_DIR, MARKET_TZ
 from etf_tracker.data_fetcher import ETFDataFetcher, get_supported_etfs
 from etf_tracker.strategy import ETFStrategy
 from etf_tracker.plotter import ETFPlotter
@@ -26,36 +25,129 @@ from etf_tracker.plotter import ETFPlotter
 # Try to import line_bot module (optional)
 try:
     from etf_tracker.line_bot import broadcast_etf_report, LINE_AVAILABLE
-    logger.info(f"LINE bot module loaded. LINE notifications {'enabled' if LINE_AVAILABLE else 'disabled (missing credentials)'}")
+    logger.info("LINE bot module loaded. LINE notifications %s", 'enabled' if LINE_AVAILABLE else 'disabled (missing credentials)')
 except ImportError:
     LINE_AVAILABLE = False
     logger.warning("LINE bot module not available. LINE notifications will be disabled.")
     # Create a dummy function that does nothing
-    def broadcast_etf_report(etf_code, user_ids=None):
-        logger.warning(f"LINE bot not available, notification for {etf_code} skipped")
+    def broadcast_etf_report(etf_codes, user_ids=None):
+        logger.warning("LINE bot not available, notification for %s skipped", etf_codes)
         return
 
 # Create reports directory if it doesn't exist
 REPORTS_DIR = Path('etf_tracker/reports')
 REPORTS_DIR.mkdir(exist_ok=True, parents=True)
 
+# Computed signals, keyed by the last bar and length of the input data; kept
+# out of REPORTS_DIR, which is served publicly as the static folder
+_SIGNAL_CACHE = FileCache(DEFAULT_CACHE_DIR / 'signals', ttl=24 * 60 * 60)
+
 # Configuration
 DEFAULT_ETF_CODES = ['0050', '006208']
+MAX_WORKERS = 8
+
+# Per-ETF locks so the scheduler, refresh endpoint and web renders never draw the same charts at once
+_RENDER_LOCKS = {}
+_RENDER_LOCKS_LOCK = threading.Lock()
+
+def _render_lock(etf_code):
+    """Return the lock that guards chart rendering for an ETF"""
+    with _RENDER_LOCKS_LOCK:
+        return _RENDER_LOCKS.setdefault(etf_code, threading.Lock())
 
-def process_etf(etf_code, save_data=True, generate_plots=True, period="1y"):
+def _signal_cache_name(data):
+    """
+    Build the signal cache entry name for a price history
+    
+    Args:
+        data (pandas.DataFrame): OHLCV data for the ETF
+        
+    Returns:
+        str: Cache entry name
+    """
+    last_date = data.index[-1]
+    # The last bar's prices guard against sample data sharing a key with real data
+    last_bar = FileCache.make_key(*data[['Open', 'High', 'Low', 'Close', 'Volume']].iloc[-1])
+    return f"{last_date:%Y%m%d}_{len(data)}_{last_bar[:8]}"
+
+def _write_json(path, obj):
+    """
+    Atomically write an object as indented JSON
+    
+    Args:
+        path (Path): Destination file
+        obj: JSON-serializable object (NumPy scalars are allowed)
+    """
+    # Write to a temporary file first so readers never see a partial file
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    os.replace(tmp_path, path)
+
+def _reuse_previous_plots(etf_code, signal_info):
+    """
+    Reuse the most recent charts if the signal has not changed since they were drawn
+    
+    Args:
+        etf_code (str): ETF code
+        signal_info (dict): Latest signal info for the ETF
+        
+    Returns:
+        str: Path to today's summary plot, or None if the plots must be regenerated
+    """
+    signal_files = sorted(REPORTS_DIR.glob(f"{etf_code}_signal_*.json"))
+    if not signal_files:
+        return None
+    
+    try:
+        previous = orjson.loads(signal_files[-1].read_bytes())
+    except (OSError, ValueError) as e:
+        logger.warning("Could not read previous signal for %s: %s", etf_code, e)
+        return None
+    
+    # Charts show the latest bar, so the date must match as well
+    latest_date = signal_info['date']
+    if hasattr(latest_date, 'strftime'):
+        latest_date = latest_date.strftime('%Y-%m-%d')
+    current = (signal_info['signal'], signal_info['close'], latest_date)
+    if (previous.get('signal'), previous.get('close'), previous.get('date')) != current:
+        return None
+    
+    previous_day = signal_files[-1].stem.rsplit('_', 1)[1]
+    today = datetime.now().strftime('%Y-%m-%d')
+    for kind in ('technical', 'summary'):
+        source = REPORTS_DIR / f"{etf_code}_{kind}_{previous_day}.png"
+        if not source.exists():
+            return None
+        target = REPORTS_DIR / f"{etf_code}_{kind}_{today}.png"
+        if source != target:
+            # Copy beside the target and swap it in so readers never see a partial file
+            tmp_path = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+        else:
+            # Still current, so mark today's charts fresh again
+            target.touch()
+    
+    logger.info("Signal for %s unchanged since %s, reusing plots", etf_code, previous_day)
+    return str(target)
+
+def process_etf(etf_code, save_data=True, generate_plots=True, period="1y", data_format="parquet",
+                force_plots=False):
     """
     Process a single ETF - fetch data, calculate signals, generate plots
     
     Args:
         etf_code (str): ETF code to process
-        save_data (bool): Whether to save data to CSV
+        save_data (bool): Whether to save the fetched data
         generate_plots (bool): Whether to generate plots
         period (str): Time period for data fetching
+        data_format (str): "parquet" (zstd-compressed) or "csv" for saved data
+        force_plots (bool): Regenerate plots even if the signal is unchanged
         
     Returns:
         tuple: (DataFrame with signals, signal info dict, plot filepath)
     """
-    logger.info(f"Processing ETF {etf_code}")
+    logger.info("Processing ETF %s", etf_code)
     
     try:
         # 1. Fetch data
@@ -63,36 +155,49 @@ def process_etf(etf_code, save_data=True, generate_plots=True, period="1y"):
         data = fetcher.fetch_historical_data(period=period)
         
         if data is None or data.empty:
-            logger.error(f"Failed to fetch data for {etf_code}")
+            logger.error("Failed to fetch data for %s", etf_code)
             return None, None, None
         
         # 2. Save data if requested
         if save_data:
             today = datetime.now().strftime('%Y-%m-%d')
-            csv_path = REPORTS_DIR / f"{etf_code}_{today}.csv"
-            data.to_csv(csv_path)
-            logger.info(f"Saved data to {csv_path}")
+            data_path = REPORTS_DIR / f"{etf_code}_{today}.{data_format}"
+            fetcher.save_data(data, data_path, compression='zstd')
         
-        # 3. Calculate signals
+        # 3. Calculate signals, reusing earlier results for the same data
         strategy = ETFStrategy(data)
-        df_with_signals = strategy.generate_signals()
+        cache_name = _signal_cache_name(data)
+        df_with_signals = _SIGNAL_CACHE.get(etf_code, cache_name)
         
         if df_with_signals is None:
-            logger.error(f"Failed to generate signals for {etf_code}")
-            return data, None, None
+            df_with_signals = strategy.generate_signals()
+            
+            if df_with_signals is None:
+                logger.error("Failed to generate signals for %s", etf_code)
+                return data, None, None
+            
+            _SIGNAL_CACHE.set(etf_code, cache_name, df_with_signals)
+            # Entries for older data are never read again
+            _SIGNAL_CACHE.prune(etf_code)
+        else:
+            logger.info("Using cached signals for %s", etf_code)
         
         # 4. Get latest signal info
         signal_info = strategy.get_latest_signal(df_with_signals)
         
-        # 5. Generate plots if requested
+        # 5. Generate plots if requested and the signal changed
         image_path = None
         if generate_plots:
-            plotter = ETFPlotter(df_with_signals, etf_code, output_dir=str(REPORTS_DIR))
-            # Generate detailed technical analysis plot
-            tech_image_path = plotter.plot_all()
-            # Generate summary plot
-            summary_image_path = plotter.plot_signal_summary()
-            image_path = summary_image_path
+            with _render_lock(etf_code):
+                if not force_plots:
+                    image_path = _reuse_previous_plots(etf_code, signal_info)
+                if image_path is None:
+                    plotter = ETFPlotter(df_with_signals, etf_code, output_dir=str(REPORTS_DIR))
+                    # Generate detailed technical analysis plot
+                    tech_image_path = plotter.plot_all()
+                    # Generate summary plot
+                    summary_image_path = plotter.plot_signal_summary()
+                    image_path = summary_image_path
         
         # 6. Save signal info to JSON
         if signal_info:
@@ -101,17 +206,16 @@ def process_etf(etf_code, save_data=True, generate_plots=True, period="1y"):
                 signal_info['date'] = signal_info['date'].strftime('%Y-%m-%d')
                 
             signal_file = REPORTS_DIR / f"{etf_code}_signal_{datetime.now().strftime('%Y-%m-%d')}.json"
-            with open(signal_file, 'w') as f:
-                json.dump(signal_info, f, indent=2)
-            logger.info(f"Saved signal info to {signal_file}")
+            _write_json(signal_file, signal_info)
+            logger.info("Saved signal info to %s", signal_file)
         
         return df_with_signals, signal_info, image_path
     
     except Exception as e:
-        logger.error(f"Error processing ETF {etf_code}: {e}")
+        logger.error("Error processing ETF %s: %s", etf_code, e)
         return None, None, None
 
-def process_all_etfs(etf_codes=None, notify=False, user_ids=None):
+def process_all_etfs(etf_codes=None, notify=False, user_ids=None, data_format="parquet", force_plots=False):
     """
     Process multiple ETFs and optionally send notifications
     
@@ -119,6 +223,8 @@ def process_all_etfs(etf_codes=None, notify=False, user_ids=None):
         etf_codes (list): List of ETF codes to process. If None, uses all supported ETFs.
         notify (bool): Whether to send LINE notifications
         user_ids (list): User IDs to notify. Required if notify=True.
+        data_format (str): "parquet" or "csv" for saved data
+        force_plots (bool): Regenerate plots even if signals are unchanged
         
     Returns:
         dict: Results for each ETF
@@ -129,25 +235,36 @@ def process_all_etfs(etf_codes=None, notify=False, user_ids=None):
     
     results = {}
     
-    for etf_code in etf_codes:
-        df, signal_info, image_path = process_etf(etf_code)
-        results[etf_code] = {
-            'data_processed': df is not None,
-            'signal': signal_info['signal'] if signal_info else None,
-            'image_path': image_path
+    # Each ETF is independent and mostly waits on the network, so process them concurrently
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(etf_codes)))) as executor:
+        futures = {
+            etf_code: executor.submit(process_etf, etf_code, data_format=data_format, force_plots=force_plots)
+            for etf_code in etf_codes
         }
         
-        # Send notification if requested and LINE bot is available
-        if notify and LINE_AVAILABLE and user_ids and signal_info:
+        for etf_code, future in futures.items():
+            df, signal_info, image_path = future.result()
+            results[etf_code] = {
+                'data_processed': df is not None,
+                'signal': signal_info['signal'] if signal_info else None,
+                'image_path': image_path
+            }
+    
+    # Send notifications from this thread once every ETF is done
+    if notify and LINE_AVAILABLE and user_ids:
+        notify_codes = [code for code, result in results.items() if result['signal']]
+        if notify_codes:
             try:
-                logger.info(f"Broadcasting {etf_code} report to {len(user_ids)} users")
-                broadcast_etf_report(etf_code, user_ids)
-                results[etf_code]['notification_sent'] = True
+                logger.info("Broadcasting %s reports to %s users", ', '.join(notify_codes), len(user_ids))
+                broadcast_etf_report(notify_codes, user_ids)
+                sent = True
             except Exception as e:
-                logger.error(f"Error sending notification for {etf_code}: {e}")
-                results[etf_code]['notification_sent'] = False
-        elif notify:
-            logger.warning(f"Notifications requested but LINE is not available or user_ids not provided")
+                logger.error("Error sending notifications: %s", e)
+                sent = False
+            for code in notify_codes:
+                results[code]['notification_sent'] = sent
+    elif notify:
+        logger.warning("Notifications requested but LINE is not available or user_ids not provided")
     
     return results
 
@@ -164,25 +281,27 @@ def scheduled_job():
     
     # Log results
     success_count = sum(1 for etf, result in results.items() if result['data_processed'])
-    logger.info(f"Scheduled job completed. Processed {success_count}/{len(results)} ETFs successfully.")
+    logger.info("Scheduled job completed. Processed %s/%s ETFs successfully.", success_count, len(results))
 
 def run_scheduled_jobs():
     """Configure and run scheduled jobs"""
-    # Schedule daily job at market close (2:30 PM Taiwan time)
-    schedule.every().monday.at("14:30").do(scheduled_job)
-    schedule.every().tuesday.at("14:30").do(scheduled_job)
-    schedule.every().wednesday.at("14:30").do(scheduled_job)
-    schedule.every().thursday.at("14:30").do(scheduled_job)
-    schedule.every().friday.at("14:30").do(scheduled_job)
+    # The scheduler sleeps until the next fire time instead of polling
+    scheduler = BlockingScheduler(timezone=MARKET_TZ)
+    
+    # Schedule daily job at market close (2:30 PM Taiwan time) on weekdays
+    scheduler.add_job(scheduled_job, 'cron', day_of_week='mon-fri', hour=14, minute=30)
     
     logger.info("Scheduled jobs configured. Running scheduler...")
     
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("Scheduler stopped")
 
 def main():
     """Main entry point with command line arguments"""
+    configure_logging()
+    
     parser = argparse.ArgumentParser(description='ETF Tracker & Analyzer')
     
     parser.add_argument('--etf', type=str, help='ETF code to analyze')
@@ -190,8 +309,11 @@ def main():
     parser.add_argument('--schedule', action='store_true', help='Run as a scheduled service')
     parser.add_argument('--notify', action='store_true', help='Send LINE notifications')
     parser.add_argument('--period', type=str, default="1y", help='Data period (e.g., 1y, 6mo)')
+    parser.add_argument('--csv', action='store_true', help='Save data as CSV instead of Parquet')
+    parser.add_argument('--force-plots', action='store_true', help='Regenerate plots even if the signal is unchanged')
     
     args = parser.parse_args()
+    data_format = 'csv' if args.csv else 'parquet'
     
     # Get user IDs for notification
     user_ids_str = os.getenv('LINE_USER_IDS')
@@ -208,16 +330,18 @@ def main():
     elif args.all:
         # Process all ETFs
         logger.info("Processing all ETFs")
-        results = process_all_etfs(notify=args.notify, user_ids=user_ids)
-        logger.info(f"Processed {len(results)} ETFs")
+        results = process_all_etfs(notify=args.notify, user_ids=user_ids, data_format=data_format,
+                                   force_plots=args.force_plots)
+        logger.info("Processed %s ETFs", len(results))
     elif args.etf:
         # Process a single ETF
         etf_code = args.etf
-        logger.info(f"Processing ETF {etf_code}")
-        df, signal_info, image_path = process_etf(etf_code, period=args.period)
+        logger.info("Processing ETF %s", etf_code)
+        df, signal_info, image_path = process_etf(etf_code, period=args.period, data_format=data_format,
+                                                  force_plots=args.force_plots)
         
         if signal_info:
-            logger.info(f"Signal for {etf_code}: {signal_info['signal']}")
+            logger.info("Signal for %s: %s", etf_code, signal_info['signal'])
             
         # Send notification if requested
         if args.notify and LINE_AVAILABLE and signal_info and user_ids:
@@ -5,28 +5,41 @@ Generates charts and visualizations of technical indicators
 import os
 import pandas as pd
 import numpy as np
+import matplotlib
+# Render off-screen unless a backend was chosen explicitly (e.g., MPLBACKEND=TkAgg)
+if not os.environ.get('MPLBACKEND'):
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
 import logging
+import threading
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# NumExpr fuses the candlestick arithmetic into single passes (optional)
+try:
+    import numexpr as ne
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
 # Set plot style
 plt.style.use('seaborn-v0_8-darkgrid')
 plt.rcParams['figure.figsize'] = (14, 10)
 plt.rcParams['font.size'] = 12
+# Drop line vertices that deviate less than a pixel; charts have hundreds of points
+plt.rcParams['path.simplify_threshold'] = 1.0
+
+# Figures reused by every plotter on the same thread (e.g. across ETFs in a batch)
+_thread_figures = threading.local()
 
 class ETFPlotter:
     """Class to generate technical analysis charts for ETFs"""
     
-    def __init__(self, data, etf_code, output_dir='etf_tracker/reports'):
+    def __init__(self, data, etf_code, output_dir='etf_tracker/reports', figures=None):
         """
         Initialize the plotter
         
@@ -34,6 +47,8 @@ class ETFPlotter:
             data (pandas.DataFrame): DataFrame with price data and indicators
             etf_code (str): ETF code (e.g., "0050")
             output_dir (str): Directory to save output files
+            figures (dict, optional): Reusable figures keyed by chart name. If None,
+                figures are shared with the other plotters on the current thread
         """
         if not isinstance(data, pd.DataFrame):
             raise TypeError("Data must be a pandas DataFrame")
@@ -47,14 +62,46 @@ class ETFPlotter:
         if missing:
             raise ValueError(f"DataFrame missing required columns: {missing}")
             
-        self.data = data.copy()
+        # Plotting only reads the data, so no defensive copy is needed
+        self.data = data
         self.etf_code = etf_code
         self.output_dir = output_dir
+        if figures is None:
+            if not hasattr(_thread_figures, 'figures'):
+                _thread_figures.figures = {}
+            figures = _thread_figures.figures
+        self._figures = figures
         
         # Ensure output directory exists
         os.makedirs(output_dir, exist_ok=True)
         
-        logger.info(f"Initialized ETFPlotter for {etf_code} with {len(data)} data points")
+        logger.info("Initialized ETFPlotter for %s with %s data points", etf_code, len(data))
+        
+    def _get_figure(self, name, figsize, show_plot=False):
+        """
+        Get a cleared figure to draw on
+        
+        Figures are created outside pyplot and reused across calls (and across
+        plotters on the same thread), so no global pyplot state is touched.
+        Figures to be shown go through pyplot and are closed once shown.
+        
+        Args:
+            name (str): Name of the chart the figure is used for
+            figsize (tuple): Figure size in inches
+            show_plot (bool): Whether the figure will be displayed
+            
+        Returns:
+            matplotlib.figure.Figure: Empty figure
+        """
+        if show_plot:
+            return plt.figure(figsize=figsize)
+        
+        fig = self._figures.get(name)
+        if fig is None:
+            fig = self._figures[name] = Figure(figsize=figsize)
+        else:
+            fig.clf()
+        return fig
         
     def plot_all(self, last_n_days=180, show_plot=False):
         """
@@ -73,114 +120,145 @@ class ETFPlotter:
         else:
             plot_data = self.data
             
+        # Pull every column the helpers need as arrays once
+        x = plot_data.index.to_numpy()
+        o, h, l, c, v = [plot_data[col].to_numpy() for col in ('Open', 'High', 'Low', 'Close', 'Volume')]
+        ma_dict = {col.split('_')[1]: plot_data[col].to_numpy() for col in plot_data.columns if col.startswith('MA_')}
+        signals = plot_data['SignalCategory'].to_numpy() if 'SignalCategory' in plot_data.columns else None
+        
         # Create figure and grid
-        fig = plt.figure(figsize=(16, 12))
-        gs = GridSpec(4, 1, height_ratios=[3, 1, 1, 1])
+        fig = self._get_figure('technical', (16, 12), show_plot)
+        gs = GridSpec(4, 1, figure=fig, height_ratios=[3, 1, 1, 1])
         
         # Price chart with MAs
-        ax1 = plt.subplot(gs[0])
-        self._plot_price_chart(ax1, plot_data)
+        ax1 = fig.add_subplot(gs[0])
+        self._plot_price_chart(ax1, x, o, h, l, c, ma_dict, signals)
         
         # Volume
-        ax2 = plt.subplot(gs[1], sharex=ax1)
-        self._plot_volume(ax2, plot_data)
+        ax2 = fig.add_subplot(gs[1], sharex=ax1)
+        self._plot_volume(ax2, x, o, c, v)
         
         # KD
-        ax3 = plt.subplot(gs[2], sharex=ax1)
-        self._plot_kd(ax3, plot_data)
+        ax3 = fig.add_subplot(gs[2], sharex=ax1)
+        self._plot_kd(ax3, x, plot_data['K'].to_numpy(), plot_data['D'].to_numpy())
         
         # MACD
-        ax4 = plt.subplot(gs[3], sharex=ax1)
-        self._plot_macd(ax4, plot_data)
+        ax4 = fig.add_subplot(gs[3], sharex=ax1)
+        self._plot_macd(ax4, x, plot_data['MACD'].to_numpy(), plot_data['MACD_Signal'].to_numpy(),
+                        plot_data['MACD_Hist'].to_numpy())
         
         # Format x-axis
         ax4.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        plt.xticks(rotation=45)
+        ax4.tick_params(axis='x', labelrotation=45)
         
         # Add title
-        latest_close = plot_data['Close'].iloc[-1]
+        latest_close = c[-1]
         latest_date = plot_data.index[-1].strftime('%Y-%m-%d')
-        change = plot_data['Close'].iloc[-1] - plot_data['Close'].iloc[-2]
-        change_pct = (change / plot_data['Close'].iloc[-2]) * 100
+        change = c[-1] - c[-2]
+        change_pct = (change / c[-2]) * 100
         
         # Get signal if available
         signal_text = ""
-        if 'SignalCategory' in plot_data.columns:
-            signal = plot_data['SignalCategory'].iloc[-1]
-            signal_text = f" | Signal: {signal}"
+        if signals is not None:
+            signal_text = f" | Signal: {signals[-1]}"
             
         title = f"{self.etf_code} Technical Analysis | {latest_date} | Close: {latest_close:.2f} ({change_pct:+.2f}%){signal_text}"
         fig.suptitle(title, fontsize=16)
         
         # Adjust layout
-        plt.tight_layout()
-        plt.subplots_adjust(top=0.95)
+        fig.tight_layout()
+        fig.subplots_adjust(top=0.95)
         
         # Save figure
         today = datetime.now().strftime('%Y-%m-%d')
         filename = f"{self.etf_code}_technical_{today}.png"
         filepath = os.path.join(self.output_dir, filename)
-        plt.savefig(filepath, dpi=100)
-        logger.info(f"Saved plot to {filepath}")
+        self._save_figure(fig, filepath)
+        logger.info("Saved plot to %s", filepath)
         
         if show_plot:
             plt.show()
-        else:
             plt.close(fig)
             
         return filepath
         
-    def _plot_price_chart(self, ax, data):
+    @staticmethod
+    def _save_figure(fig, filepath):
+        """
+        Save a figure as a PNG without exposing a partially written file
+        
+        Args:
+            fig (matplotlib.figure.Figure): Figure to save
+            filepath (str): Destination path
+        """
+        # Render to a temporary file first; charts may be served while they are replaced
+        tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            fig.savefig(tmp_path, format='png', dpi=100)
+            os.replace(tmp_path, filepath)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+    def _plot_price_chart(self, ax, x, o, h, l, c, ma_dict, signals):
         """Plot price chart with MAs"""
         # Plot candlestick chart
         width = 0.6
         width2 = width * 0.8
         
-        up = data[data['Close'] >= data['Open']]
-        down = data[data['Close'] < data['Open']]
+        up = c >= o
+        if NUMEXPR_AVAILABLE:
+            body_top = ne.evaluate('where(up, c, o)')
+            body_bottom = ne.evaluate('where(up, o, c)')
+            body = ne.evaluate('abs(c - o)')
+            upper = ne.evaluate('h - where(up, c, o)')
+            lower = ne.evaluate('where(up, o, c) - l')
+        else:
+            body_top = np.maximum(o, c)
+            body_bottom = np.minimum(o, c)
+            body = body_top - body_bottom
+            upper = h - body_top
+            lower = body_bottom - l
         
-        # Up candles - now RED
-        ax.bar(up.index, up['Close']-up['Open'], width, bottom=up['Open'], color='#F23645')
-        ax.bar(up.index, up['High']-up['Close'], width2, bottom=up['Close'], color='#F23645')
-        ax.bar(up.index, up['Open']-up['Low'], width2, bottom=up['Low'], color='#F23645')
+        # Up candles RED, down candles GREEN
+        colors = np.where(up, '#F23645', '#089981')
         
-        # Down candles - now GREEN
-        ax.bar(down.index, down['Open']-down['Close'], width, bottom=down['Close'], color='#089981')
-        ax.bar(down.index, down['High']-down['Open'], width2, bottom=down['Open'], color='#089981')
-        ax.bar(down.index, down['Close']-down['Low'], width2, bottom=down['Low'], color='#089981')
+        # Body, upper wick and lower wick
+        ax.bar(x, body, width, bottom=body_bottom, color=colors)
+        ax.bar(x, upper, width2, bottom=body_top, color=colors)
+        ax.bar(x, lower, width2, bottom=l, color=colors)
         
         # Add moving averages
-        ma_columns = [col for col in data.columns if col.startswith('MA_')]
-        for column in ma_columns:
-            period = column.split('_')[1]
-            ax.plot(data.index, data[column], label=f'{period}-day MA', linewidth=1.5)
+        for period, ma in ma_dict.items():
+            ax.plot(x, ma, label=f'{period}-day MA', linewidth=1.5)
             
         # Add buy/sell signals if available
-        if 'SignalCategory' in data.columns:
-            buys = data[data['SignalCategory'].isin(['Buy', 'Strong Buy'])]
-            sells = data[data['SignalCategory'].isin(['Sell', 'Strong Sell'])]
+        if signals is not None:
+            buys = np.isin(signals, ['Buy', 'Strong Buy'])
+            sells = np.isin(signals, ['Sell', 'Strong Sell'])
             
-            if not buys.empty:
-                ax.scatter(buys.index, buys['Low'] * 0.99, marker='^', color='red', s=100, label='Buy Signal')
+            if buys.any():
+                ax.scatter(x[buys], l[buys] * 0.99, marker='^', color='red', s=100, label='Buy Signal')
                 
-            if not sells.empty:
-                ax.scatter(sells.index, sells['High'] * 1.01, marker='v', color='green', s=100, label='Sell Signal')
+            if sells.any():
+                ax.scatter(x[sells], h[sells] * 1.01, marker='v', color='green', s=100, label='Sell Signal')
         
         ax.set_ylabel('Price')
         ax.grid(True, alpha=0.3)
         ax.legend(loc='upper left')
         
-    def _plot_volume(self, ax, data):
+    def _plot_volume(self, ax, x, o, c, v):
         """Plot volume bars"""
-        ax.bar(data.index, data['Volume'], width=0.8, 
-               color=data.apply(lambda x: '#F23645' if x['Close'] >= x['Open'] else '#089981', axis=1))
+        colors = np.where(c >= o, '#F23645', '#089981')
+        ax.bar(x, v, width=0.8, color=colors)
         ax.set_ylabel('Volume')
         ax.grid(True, alpha=0.3)
         
-    def _plot_kd(self, ax, data):
+    def _plot_kd(self, ax, x, k, d):
         """Plot KD indicator"""
-        ax.plot(data.index, data['K'], label='K', color='blue', linewidth=1.5)
-        ax.plot(data.index, data['D'], label='D', color='orange', linewidth=1.5)
+        ax.plot(x, k, label='K', color='blue', linewidth=1.5)
+        ax.plot(x, d, label='D', color='orange', linewidth=1.5)
         
         # Add overbought/oversold lines
         ax.axhline(y=80, color='red', linestyle='--', alpha=0.3)
@@ -191,27 +269,27 @@ class ETFPlotter:
         ax.grid(True, alpha=0.3)
         ax.legend(loc='upper left')
         
-    def _plot_macd(self, ax, data):
+    def _plot_macd(self, ax, x, macd, macd_signal, macd_hist):
         """Plot MACD indicator"""
-        ax.plot(data.index, data['MACD'], label='MACD', color='blue', linewidth=1.5)
-        ax.plot(data.index, data['MACD_Signal'], label='Signal', color='orange', linewidth=1.5)
+        ax.plot(x, macd, label='MACD', color='blue', linewidth=1.5)
+        ax.plot(x, macd_signal, label='Signal', color='orange', linewidth=1.5)
         
         # Add histogram
-        ax.bar(data.index, data['MACD_Hist'], width=0.8, color=data.apply(
-            lambda x: '#F23645' if x['MACD_Hist'] >= 0 else '#089981', axis=1
-        ))
+        colors = np.where(macd_hist >= 0, '#F23645', '#089981')
+        ax.bar(x, macd_hist, width=0.8, color=colors)
         
         ax.axhline(y=0, color='gray', linestyle='-', alpha=0.3)
         ax.set_ylabel('MACD')
         ax.grid(True, alpha=0.3)
         ax.legend(loc='upper left')
         
-    def plot_signal_summary(self, show_plot=False):
+    def plot_signal_summary(self, show_plot=False, filepath=None):
         """
         Generate a summary plot for the latest signal
         
         Args:
             show_plot (bool): Whether to display the plot
+            filepath (str, optional): Path to save the image to. If None, uses default naming.
             
         Returns:
             str: Path to saved image
@@ -220,7 +298,8 @@ class ETFPlotter:
         data = self.data.iloc[-60:]
         
         # Create figure
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig = self._get_figure('summary', (10, 6), show_plot)
+        ax = fig.add_subplot()
         
         # Plot close price
         ax.plot(data.index, data['Close'], label='Close Price', color='#1E88E5', linewidth=2)
@@ -266,30 +345,33 @@ class ETFPlotter:
         
         # Format x-axis
         ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-        plt.xticks(rotation=45)
+        ax.tick_params(axis='x', labelrotation=45)
         
         ax.set_ylabel('Price')
         ax.grid(True, alpha=0.3)
         ax.legend(loc='upper left')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Save figure
-        today = datetime.now().strftime('%Y-%m-%d')
-        filename = f"{self.etf_code}_summary_{today}.png"
-        filepath = os.path.join(self.output_dir, filename)
-        plt.savefig(filepath, dpi=100)
-        logger.info(f"Saved summary plot to {filepath}")
+        if filepath is None:
+            today = datetime.now().strftime('%Y-%m-%d')
+            filename = f"{self.etf_code}_summary_{today}.png"
+            filepath = os.path.join(self.output_dir, filename)
+        self._save_figure(fig, filepath)
+        logger.info("Saved summary plot to %s", filepath)
         
         if show_plot:
             plt.show()
-        else:
             plt.close(fig)
             
         return filepath
         
 # Testing functionality
 if __name__ == "__main__":
+    from logging_config import configure_logging
+    configure_logging()
+    
     # Test with some sample data
     from data_fetcher import ETFDataFetcher
     from strategy import ETFStrategy
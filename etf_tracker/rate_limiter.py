@@ -0,0 +1,68 @@
+"""
+Rate Limiter Module for ETF Tracker
+Throttles outbound requests to Yahoo Finance so bursts don't trip its rate limits
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+
+class RateLimiter:
+    """
+    Token bucket limiting concurrent and per-period requests
+
+    The allowed rate adapts to the upstream: it is halved whenever a request
+    fails and recovers by one request per period after each success.
+    """
+
+    def __init__(self, max_concurrent=5, requests_per_period=10, period=60.0, min_rate=1):
+        """
+        Initialize the rate limiter
+
+        Args:
+            max_concurrent (int): Maximum number of requests in flight at once
+            requests_per_period (int): Maximum number of requests per period
+            period (float): Length of the period in seconds
+            min_rate (int): Lowest rate the limiter backs off to
+        """
+        self.max_rate = float(requests_per_period)
+        self.min_rate = float(min_rate)
+        self.rate = float(requests_per_period)
+        self.period = period
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._tokens = self.rate
+        self._updated = time.monotonic()
+
+    def _acquire_token(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                refill = (now - self._updated) * self.rate / self.period
+                self._tokens = min(self.rate, self._tokens + refill)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.period / self.rate
+            time.sleep(wait)
+
+    @contextmanager
+    def limit(self):
+        """Context manager wrapping a single rate-limited request"""
+        with self._semaphore:
+            self._acquire_token()
+            yield
+
+    def record_success(self):
+        """Additively increase the allowed rate after a successful request"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 1)
+
+    def record_failure(self):
+        """Halve the allowed rate after a failed or throttled request"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, self.rate)
@@ -0,0 +1,42 @@
+"""
+Serialization Module for ETF Tracker
+Coerces signal info into the numeric types expected by the report pages and API
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Numeric signal fields with their type and the default used for missing or invalid values
+SIGNAL_FIELDS = {
+    'close': (float, 0.0),
+    'change_percent': (float, 0.0),
+    'volume': (int, 0),
+    'k_value': (float, 0.0),
+    'd_value': (float, 0.0),
+    'macd': (float, 0.0),
+    'macd_signal': (float, 0.0),
+    'rsi': (float, 0.0)
+}
+
+def _coerce(value, typ, default):
+    """Convert a value to the given type, falling back to the default"""
+    try:
+        return typ(value)
+    except (TypeError, ValueError):
+        if value is not None:
+            logger.warning("Could not convert %r to %s, using %r", value, typ.__name__, default)
+        return default
+
+def coerce_signal_info(signal_info, fields=SIGNAL_FIELDS):
+    """
+    Coerce the numeric fields of signal info to their expected types
+    
+    Args:
+        signal_info (dict): Signal information (e.g., loaded from a saved report)
+        fields (dict): Field name to (type, default) mapping
+        
+    Returns:
+        dict: Copy of the signal info with every field present and correctly typed
+    """
+    coerced = {name: _coerce(signal_info.get(name), typ, default) for name, (typ, default) in fields.items()}
+    return {**signal_info, **coerced}
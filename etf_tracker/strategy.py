@@ -7,13 +7,13 @@ import numpy as np
 import ta
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from etf_tracker._kernels import compute_indicators, categorize_strength, running_sma, kd_loop, rsi_wilder_loop
+
 logger = logging.getLogger(__name__)
 
+# Signal categories indexed by category code + 2 (see categorize_strength)
+SIGNAL_CATEGORIES = np.array(['Strong Sell', 'Sell', 'Hold', 'Buy', 'Strong Buy'], dtype=object)
+
 class ETFStrategy:
     """Class to implement technical analysis strategies for ETFs"""
     
@@ -35,42 +35,80 @@ class ETFStrategy:
         if missing:
             raise ValueError(f"DataFrame missing required columns: {missing}")
         
-        self.data = data.copy()
+        # Copy and downcast in one step; single precision is plenty for prices
+        # and halves memory traffic. Volume stays 64-bit since daily share
+        # volumes can exceed the int32 range
+        self.data = data.astype({
+            'Open': np.float32,
+            'High': np.float32,
+            'Low': np.float32,
+            'Close': np.float32,
+            'Volume': np.int64
+        })
+        self._indicators = None
+        self._signals_df = None
+        
         # Convert index to datetime if not already
         if not isinstance(self.data.index, pd.DatetimeIndex):
             try:
                 self.data.index = pd.to_datetime(self.data.index)
             except Exception as e:
-                logger.warning(f"Could not convert index to datetime: {e}")
+                logger.warning("Could not convert index to datetime: %s", e)
                 
-        logger.info(f"Initialized ETFStrategy with {len(data)} data points")
+        logger.info("Initialized ETFStrategy with %s data points", len(data))
         
     def calculate_all_indicators(self):
         """
         Calculate all technical indicators
         
+        The result is memoized on the instance, so repeat calls (e.g.
+        generate_signals() followed by get_latest_signal()) only compute once.
+        
         Returns:
             pandas.DataFrame: Data with indicators added
         """
+        if self._indicators is None:
+            self._indicators = self._calculate_all_indicators()
+        
+        # Callers add signal columns in place, so hand out a copy
+        return None if self._indicators is None else self._indicators.copy()
+    
+    def _calculate_all_indicators(self):
+        """Calculate all technical indicators without memoization"""
         try:
-            # Make a copy to avoid modifying the original
-            df = self.data.copy()
+            high = self.data['High'].to_numpy(dtype=np.float64)
+            low = self.data['Low'].to_numpy(dtype=np.float64)
+            close = self.data['Close'].to_numpy(dtype=np.float64)
+            n = len(close)
             
-            # Calculate Moving Averages
-            df = self.add_moving_averages(df)
+            # Same parameters as the add_* defaults; the kernel accumulates
+            # in double precision and stores float32 results
+            ma_periods = np.array([5, 10, 20, 60])
+            out_ma = np.empty((len(ma_periods), n), dtype=np.float32)
+            k, d = np.empty(n, dtype=np.float32), np.empty(n, dtype=np.float32)
+            macd = np.empty(n, dtype=np.float32)
+            macd_signal = np.empty(n, dtype=np.float32)
+            macd_hist = np.empty(n, dtype=np.float32)
+            rsi = np.empty(n, dtype=np.float32)
             
-            # Calculate KD (Stochastic Oscillator)
-            df = self.add_kd_indicator(df)
+            # MAs, KD, MACD and RSI in a single compiled pass
+            compute_indicators(high, low, close, ma_periods, 9, 3, 12, 26, 9, 14,
+                               out_ma, k, d, macd, macd_signal, macd_hist, rsi)
             
-            # Calculate MACD
-            df = self.add_macd_indicator(df)
+            columns = {f'MA_{period}': out_ma[i] for i, period in enumerate(ma_periods)}
+            columns.update({
+                'K': k,
+                'D': d,
+                'MACD': macd,
+                'MACD_Signal': macd_signal,
+                'MACD_Hist': macd_hist,
+                'RSI': rsi
+            })
             
-            # Calculate RSI
-            df = self.add_rsi(df)
-            
-            return df
+            # assign() returns a new frame, leaving self.data untouched
+            return self.data.assign(**columns)
         except Exception as e:
-            logger.error(f"Error calculating indicators: {e}")
+            logger.error("Error calculating indicators: %s", e)
             return None
             
     def add_moving_averages(self, df, periods=[5, 10, 20, 60]):
@@ -84,8 +122,11 @@ class ETFStrategy:
         Returns:
             pandas.DataFrame: DataFrame with MAs added
         """
+        close = df['Close'].to_numpy(dtype=np.float64)
         for period in periods:
-            df[f'MA_{period}'] = ta.trend.sma_indicator(df['Close'], window=period)
+            ma = np.empty(len(close), dtype=np.float32)
+            running_sma(close, period, ma)
+            df[f'MA_{period}'] = ma
         return df
         
     def add_kd_indicator(self, df, k_period=9, d_period=3):
@@ -100,15 +141,19 @@ class ETFStrategy:
         Returns:
             pandas.DataFrame: DataFrame with KD indicator added
         """
-        stoch = ta.momentum.StochasticOscillator(
-            high=df['High'],
-            low=df['Low'],
-            close=df['Close'],
-            window=k_period,
-            smooth_window=d_period
+        n = len(df)
+        k, d = np.empty(n, dtype=np.float32), np.empty(n, dtype=np.float32)
+        kd_loop(
+            df['High'].to_numpy(dtype=np.float64),
+            df['Low'].to_numpy(dtype=np.float64),
+            df['Close'].to_numpy(dtype=np.float64),
+            k_period,
+            d_period,
+            k,
+            d
         )
-        df['K'] = stoch.stoch()
-        df['D'] = stoch.stoch_signal()
+        df['K'] = k
+        df['D'] = d
         return df
         
     def add_macd_indicator(self, df, fast=12, slow=26, signal=9):
@@ -146,7 +191,9 @@ class ETFStrategy:
         Returns:
             pandas.DataFrame: DataFrame with RSI added
         """
-        df['RSI'] = ta.momentum.rsi(df['Close'], window=period)
+        rsi = np.empty(len(df), dtype=np.float32)
+        rsi_wilder_loop(df['Close'].to_numpy(dtype=np.float64), period, rsi)
+        df['RSI'] = rsi
         return df
     
     def generate_signals(self, df=None):
@@ -165,76 +212,100 @@ class ETFStrategy:
         if df is None:
             return None
             
-        # Initialize signal column (0 = neutral/hold)
-        df['Signal'] = 0
+        # Accumulate signals in a single array (0 = neutral/hold)
+        signal = np.zeros(len(df), dtype=np.int8)
         
         # Generate KD signals
-        self._generate_kd_signals(df)
+        self._generate_kd_signals(df, signal)
         
         # Generate MACD signals
-        self._generate_macd_signals(df)
+        self._generate_macd_signals(df, signal)
         
         # Generate MA crossover signals
-        self._generate_ma_signals(df)
-        
-        # Generate combined signal
-        df['SignalStrength'] = df['Signal'].rolling(window=3).mean()
-        
-        # Define signal categories
-        def categorize_signal(row):
-            strength = row['SignalStrength']
-            if strength >= 0.7:
-                return 'Strong Buy'
-            elif strength >= 0.3:
-                return 'Buy'
-            elif strength <= -0.7:
-                return 'Strong Sell'
-            elif strength <= -0.3:
-                return 'Sell'
-            else:
-                return 'Hold'
-                
-        df['SignalCategory'] = df.apply(categorize_signal, axis=1)
+        self._generate_ma_signals(df, signal)
+        
+        df['Signal'] = signal
+        
+        # Generate combined signal (3-bar moving average of the signal)
+        sig = signal.astype(np.float32)
+        strength = np.empty(len(sig), dtype=np.float32)
+        strength[:2] = np.nan
+        strength[2:] = (sig[2:] + sig[1:-1] + sig[:-2]) * (1.0 / 3.0)
+        df['SignalStrength'] = strength
+        
+        # Categorize signals in one compiled pass; the SIMD loop compares the
+        # leading NaNs too, which would otherwise raise invalid-value warnings
+        with np.errstate(invalid='ignore'):
+            codes = categorize_strength(strength)
+        df['SignalCategory'] = SIGNAL_CATEGORIES[codes + 2]
         
+        self._signals_df = df
         return df
     
-    def _generate_kd_signals(self, df):
+    @staticmethod
+    def _crossovers(fast, slow):
+        """
+        Find the bars where one series crosses another
+        
+        Args:
+            fast (numpy.ndarray): Series that crosses
+            slow (numpy.ndarray): Series being crossed
+            
+        Returns:
+            tuple: Boolean arrays (crosses above, crosses below)
+        """
+        above = np.zeros(len(fast), dtype=bool)
+        below = np.zeros(len(fast), dtype=bool)
+        above[1:] = (fast[1:] > slow[1:]) & (fast[:-1] <= slow[:-1])
+        below[1:] = (fast[1:] < slow[1:]) & (fast[:-1] >= slow[:-1])
+        return above, below
+    
+    def _generate_kd_signals(self, df, signal):
         """Generate signals based on KD indicator"""
+        k = df['K'].to_numpy()
+        d = df['D'].to_numpy()
+        above, below = self._crossovers(k, d)
+        
         # Buy signal: K crosses above D from below in oversold territory
-        df.loc[(df['K'] > df['D']) & (df['K'].shift(1) <= df['D'].shift(1)) & (df['K'] < 30), 'Signal'] += 1
+        signal += above & (k < 30)
         
         # Sell signal: K crosses below D from above in overbought territory
-        df.loc[(df['K'] < df['D']) & (df['K'].shift(1) >= df['D'].shift(1)) & (df['K'] > 70), 'Signal'] -= 1
+        signal -= below & (k > 70)
     
-    def _generate_macd_signals(self, df):
+    def _generate_macd_signals(self, df, signal):
         """Generate signals based on MACD indicator"""
+        above, below = self._crossovers(df['MACD'].to_numpy(), df['MACD_Signal'].to_numpy())
+        
         # Buy signal: MACD crosses above signal line
-        df.loc[(df['MACD'] > df['MACD_Signal']) & (df['MACD'].shift(1) <= df['MACD_Signal'].shift(1)), 'Signal'] += 1
+        signal += above
         
         # Sell signal: MACD crosses below signal line
-        df.loc[(df['MACD'] < df['MACD_Signal']) & (df['MACD'].shift(1) >= df['MACD_Signal'].shift(1)), 'Signal'] -= 1
+        signal -= below
     
-    def _generate_ma_signals(self, df):
+    def _generate_ma_signals(self, df, signal):
         """Generate signals based on MA crossovers"""
-        # Buy signal: 5-day MA crosses above 20-day MA
         if 'MA_5' in df.columns and 'MA_20' in df.columns:
-            df.loc[(df['MA_5'] > df['MA_20']) & (df['MA_5'].shift(1) <= df['MA_20'].shift(1)), 'Signal'] += 1
+            above, below = self._crossovers(df['MA_5'].to_numpy(), df['MA_20'].to_numpy())
+            
+            # Buy signal: 5-day MA crosses above 20-day MA
+            signal += above
             
             # Sell signal: 5-day MA crosses below 20-day MA
-            df.loc[(df['MA_5'] < df['MA_20']) & (df['MA_5'].shift(1) >= df['MA_20'].shift(1)), 'Signal'] -= 1
+            signal -= below
     
     def get_latest_signal(self, df=None):
         """
         Get the latest signal from the data
         
         Args:
-            df (pandas.DataFrame, optional): Data with signals. If None, uses generate_signals()
+            df (pandas.DataFrame, optional): Data with signals. If None, reuses the last
+                generate_signals() result or generates signals
             
         Returns:
             dict: Latest signal information
         """
         if df is None:
-            df = self.generate_signals()
+            df = self._signals_df if self._signals_df is not None else self.generate_signals()
             
         if df is None or df.empty:
             return None
@@ -242,22 +313,33 @@ class ETFStrategy:
         # Get the last row
         last_row = df.iloc[-1]
         
+        # Day-over-day change of the close
+        close = df['Close'].to_numpy(dtype=np.float64)
+        prev_close = float(close[-2]) if len(close) > 1 else float(close[-1])
+        change_percent = float((close[-1] / close[-2] - 1) * 100) if len(close) > 1 else 0.0
+        
+        # float() keeps the values JSON serializable when columns are float32
         signal_info = {
             'date': last_row.name,
-            'close': last_row['Close'],
+            'close': float(last_row['Close']),
+            'prev_close': prev_close,
+            'change_percent': change_percent,
             'signal': last_row['SignalCategory'],
-            'strength': last_row['SignalStrength'],
-            'k_value': last_row['K'],
-            'd_value': last_row['D'],
-            'macd': last_row['MACD'],
-            'macd_signal': last_row['MACD_Signal'],
-            'rsi': last_row['RSI']
+            'strength': float(last_row['SignalStrength']),
+            'k_value': float(last_row['K']),
+            'd_value': float(last_row['D']),
+            'macd': float(last_row['MACD']),
+            'macd_signal': float(last_row['MACD_Signal']),
+            'rsi': float(last_row['RSI'])
         }
         
         return signal_info
         
 # Testing functionality
 if __name__ == "__main__":
+    from logging_config import configure_logging
+    configure_logging()
+    
     # Test with some sample data
     from data_fetcher import ETFDataFetcher
     
@@ -0,0 +1,5 @@
+"""
+Utilities for ETF Tracker
+Shared helpers used across the analysis modules
+"""
+from etf_tracker.utils._njit import njit, vectorize, NUMBA_AVAILABLE
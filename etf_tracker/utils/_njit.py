@@ -0,0 +1,24 @@
+"""
+Numba Compatibility Shim for ETF Tracker
+Provides njit/vectorize that fall back to plain Python/NumPy when numba is missing
+"""
+import numpy as np
+
+try:
+    from numba import njit, vectorize
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Fallback for numba.njit that returns the function unchanged"""
+        # Support both @njit and @njit(...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+    def vectorize(signatures, **kwargs):
+        """Fallback for numba.vectorize built on numpy.vectorize"""
+        # Take the output type from the first signature, e.g. 'int8(float32)'
+        otype = np.dtype(signatures[0].split('(')[0].strip())
+        return lambda func: np.vectorize(func, otypes=[otype])
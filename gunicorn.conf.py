@@ -0,0 +1,20 @@
+"""
+Gunicorn Configuration for ETF Tracker
+Serves web_server:application with gevent workers so Yahoo Finance fetches overlap across requests
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# gevent workers handle many concurrent requests while they wait on the network.
+# Chart rendering is CPU-bound and still blocks its worker while it runs; set
+# GUNICORN_WORKER_CLASS=gthread to use OS threads instead
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+worker_connections = 500
+
+# Only used by gthread workers
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Cold requests fetch data and render charts, which can take a while
+timeout = 120
@@ -14,9 +14,12 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 from etf_tracker.data_fetcher import ETFDataFetcher
 from etf_tracker.strategy import ETFStrategy
 from etf_tracker.plotter import ETFPlotter
+from etf_tracker.logging_config import configure_logging
 
 def main():
     """Test ETF Tracker functionality"""
+    configure_logging()
+    
     print("=== ETF Tracker Test ===")
     
     # Define ETF code to test
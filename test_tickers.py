@@ -4,10 +4,12 @@ Test script to determine which Yahoo Finance ticker format works for Taiwan ETFs
 """
 import os
 import sys
+import requests
 import yfinance as yf
 import pandas as pd
 from datetime import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configure logging
 logging.basicConfig(
@@ -18,11 +20,38 @@ logger = logging.getLogger(__name__)
 
 # Taiwan ETF code mappings to test
 TICKERS_TO_TEST = {
-    "0050": ["0050.TW", "0050.TWO", "0050.TWO.TW", "0050.T", "0050.TWSE", "0050.TWO"],
+    "0050": ["0050.TW", "0050.TWO", "0050.TWO.TW", "0050.T", "0050.TWSE"],
     "006208": ["006208.TW", "6208.TW", "006208.TWO", "6208.TWO", "6208.TWO.TW"],
     "00878": ["00878.TW", "0878.TW", "0878.TWO", "00878.TWO", "0878.TWO.TW"],
 }
 
+# Probes only wait on the network, so run them concurrently
+MAX_WORKERS = 16
+
+# Quote endpoint that resolves many symbols in one request
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+
+def probe_tickers(tickers):
+    """
+    Check which tickers Yahoo Finance recognizes using a single batched quote request
+    
+    Args:
+        tickers (list): Ticker symbols to check
+        
+    Returns:
+        set: Symbols that returned a quote, or None if the quote endpoint could not be used
+    """
+    try:
+        response = requests.get(QUOTE_URL, params={"symbols": ",".join(tickers)},
+                                headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        response.raise_for_status()
+        quotes = response.json()["quoteResponse"]["result"]
+    except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Batched quote lookup failed, probing tickers one by one: {e}")
+        return None
+    
+    return {quote["symbol"] for quote in quotes if quote.get("symbol")}
+
 def test_ticker(ticker, period="1mo"):
     """Test if a ticker works with yfinance"""
     try:
@@ -43,21 +72,32 @@ def test_ticker(ticker, period="1mo"):
         
 def main():
     """Test all ticker formats"""
-    results = {}
+    results = {etf_code: {"working_tickers": []} for etf_code in TICKERS_TO_TEST}
+    tasks = [(etf_code, ticker) for etf_code, tickers in TICKERS_TO_TEST.items() for ticker in tickers]
+    
+    # Resolve every candidate in one request, then only download samples for the hits
+    found = probe_tickers([ticker for _, ticker in tasks])
+    if found is not None:
+        logger.info(f"Quote lookup found {len(found)} of {len(tasks)} tickers")
+        tasks = [(etf_code, ticker) for etf_code, ticker in tasks if ticker in found]
     
-    for etf_code, ticker_formats in TICKERS_TO_TEST.items():
-        logger.info(f"\n==== Testing ETF code: {etf_code} ====")
-        results[etf_code] = {"working_tickers": []}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(test_ticker, ticker): (etf_code, ticker) for etf_code, ticker in tasks}
         
-        for ticker in ticker_formats:
-            success, data = test_ticker(ticker)
+        for future in as_completed(futures):
+            etf_code, ticker = futures[future]
+            success, data = future.result()
             
             if success:
                 results[etf_code]["working_tickers"].append(ticker)
                 # Print a sample of the data
                 if data is not None:
-                    print(f"\nSample data for {ticker}:")
+                    print(f"\nSample data for {etf_code} ({ticker}):")
                     print(data.head(3))
+    
+    # Report working formats in the order they are listed
+    for etf_code, result in results.items():
+        result["working_tickers"].sort(key=TICKERS_TO_TEST[etf_code].index)
                     
     # Print summary
     print("\n==== SUMMARY ====")
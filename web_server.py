@@ -3,199 +3,365 @@ Web Server Module for ETF Tracker
 Serves ETF analysis reports as interactive web pages
 """
 import os
-# Set matplotlib to use a non-interactive backend before any other imports
-import matplotlib
-matplotlib.use('Agg')  # Use the 'Agg' backend which doesn't require a GUI
-
-from flask import Flask, render_template, send_from_directory, abort, request
+import hmac
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, render_template, abort, request, make_response
+from flask.json.provider import JSONProvider
 import logging
-from datetime import datetime
-import json
+from datetime import datetime, timedelta
+import orjson
+from collections import OrderedDict
 from pathlib import Path
 import argparse
+from jinja2 import FileSystemBytecodeCache
+
+from etf_tracker.logging_config import configure_logging
+from etf_tracker.cache import market_aware_ttl
+from etf_tracker.serialization import coerce_signal_info
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Flask-Compress encodes HTML and JSON responses (optional)
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
+
+# Configure logging for the web server process
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Import local modules
-from etf_tracker.data_fetcher import ETFDataFetcher, get_supported_etfs
-from etf_tracker.strategy import ETFStrategy
-from etf_tracker.plotter import ETFPlotter
-from etf_tracker.main import process_etf, DEFAULT_ETF_CODES
+# The analysis modules pull in pandas, yfinance and matplotlib, so they are
+# imported on first use to keep startup fast. Set ETF_PRELOAD to load them
+# up front instead (e.g. in production, before workers fork).
+if os.environ.get('ETF_PRELOAD'):
+    import matplotlib
+    matplotlib.use('Agg')  # Use the 'Agg' backend which doesn't require a GUI
+    import matplotlib.pyplot
+    import etf_tracker.main
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, which also serializes NumPy values"""
+    
+    # Sorted keys match Flask's default provider
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS
+    
+    def dumps(self, obj, **kwargs):
+        """Serialize an object to a JSON string"""
+        return orjson.dumps(obj, option=self.option).decode()
+    
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes"""
+        return orjson.loads(s)
 
 # Initialize Flask app with proper template folder
 app = Flask(__name__, 
            static_folder='etf_tracker/reports',
+           static_url_path='/static',
            template_folder='etf_tracker/templates')
 
+# Keep compiled templates on disk so new workers skip parsing them; this must be
+# set before the Jinja environment is first used. Without ETF_JINJA_CACHE_DIR,
+# Jinja uses a private per-user temp directory and verifies its owner and mode
+JINJA_CACHE_DIR = os.getenv('ETF_JINJA_CACHE_DIR')
+if JINJA_CACHE_DIR:
+    os.makedirs(JINJA_CACHE_DIR, mode=0o700, exist_ok=True)
+app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(JINJA_CACHE_DIR)}
+
+# Serialize API responses with orjson
+app.json = OrjsonProvider(app)
+
+# Compress text responses; PNG charts are already compressed and are skipped by mimetype
+if COMPRESS_AVAILABLE:
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    Compress(app)
+
+# WSGI entry point for production servers (see gunicorn.conf.py)
+application = app
+
 # Create reports directory if it doesn't exist
 REPORTS_DIR = Path('etf_tracker/reports')
 REPORTS_DIR.mkdir(exist_ok=True, parents=True)
 
+# How long today's reports are served before reprocessing while the market is open
+REPORT_TTL = 3600
+
+# Charts are served by Flask's built-in static route, which sends ETags and
+# answers conditional GETs; clients may reuse them for as long as a report is fresh
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = REPORT_TTL
+
+# Shared secret required in the X-Refresh-Token header of refresh requests;
+# refreshing is disabled while ETF_REFRESH_TOKEN is unset
+REFRESH_TOKEN = os.getenv('ETF_REFRESH_TOKEN')
+
+# Chart rendering runs in the background so report pages never wait on matplotlib
+PLOT_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+_pending = set()
+_pending_lock = threading.Lock()
+
+# Parsed signal files (LRU), revalidated against each file's modification time
+_SIGNAL_CACHE = OrderedDict()
+_SIGNAL_CACHE_SIZE = 64
+_signal_cache_lock = threading.Lock()
+
+# Today's date string and the timestamp of the next local midnight
+_TODAY_CACHE = [0.0, '']
+
+def _today():
+    """
+    Get today's local date, formatting it only once per day
+    
+    Returns:
+        str: Today's date as YYYY-MM-DD
+    """
+    now = time.time()
+    if now >= _TODAY_CACHE[0]:
+        # Local (not UTC) date, matching the dates in saved report filenames
+        today = datetime.fromtimestamp(now).date()
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        _TODAY_CACHE[:] = [midnight.timestamp(), today.strftime('%Y-%m-%d')]
+    return _TODAY_CACHE[1]
+
+def _read_signal(path, mtime_ns):
+    """
+    Parse a saved signal file, reusing the previous result while the file is unchanged
+    
+    Args:
+        path (Path): Signal JSON file
+        mtime_ns (int): The file's current modification time in nanoseconds
+        
+    Returns:
+        dict: Signal info (shared between callers, so it must not be modified)
+    """
+    with _signal_cache_lock:
+        cached = _SIGNAL_CACHE.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            _SIGNAL_CACHE.move_to_end(path)
+            return cached[1]
+    
+    signal_info = orjson.loads(path.read_bytes())
+    
+    with _signal_cache_lock:
+        _SIGNAL_CACHE[path] = (mtime_ns, signal_info)
+        _SIGNAL_CACHE.move_to_end(path)
+        if len(_SIGNAL_CACHE) > _SIGNAL_CACHE_SIZE:
+            _SIGNAL_CACHE.popitem(last=False)
+    return signal_info
+
+def _load_fresh_signal(etf_code, today, with_plots=False, ttl=None):
+    """
+    Load today's saved signal info if it (and optionally its charts) is still fresh
+    
+    Args:
+        etf_code (str): ETF code
+        today (str): Report date as YYYY-MM-DD
+        with_plots (bool): Whether the summary and technical charts must also be fresh
+        ttl (float, optional): Maximum age in seconds. If None, uses the market-aware REPORT_TTL
+        
+    Returns:
+        dict: Saved signal info, or None on a miss
+    """
+    paths = [REPORTS_DIR / f"{etf_code}_signal_{today}.json"]
+    if with_plots:
+        paths += [REPORTS_DIR / f"{etf_code}_summary_{today}.png",
+                  REPORTS_DIR / f"{etf_code}_technical_{today}.png"]
+    
+    ttl = market_aware_ttl(REPORT_TTL) if ttl is None else ttl
+    try:
+        stats = [path.stat() for path in paths]
+        if any(time.time() - stat.st_mtime > ttl for stat in stats):
+            return None
+        signal_info = _read_signal(paths[0], stats[0].st_mtime_ns)
+    except (OSError, ValueError):
+        return None
+    
+    # Derive a missing change_percent from the previous close; reports saved
+    # before either was recorded are incomplete
+    if 'change_percent' not in signal_info:
+        prev_close = signal_info.get('prev_close')
+        if not prev_close:
+            return None
+        change_percent = (signal_info['close'] / prev_close - 1) * 100
+        signal_info = {**signal_info, 'change_percent': change_percent}
+    return signal_info
+
+def get_signal_info(etf_code, with_plots=False):
+    """
+    Get today's signal info, reprocessing the ETF only when the saved report is stale
+    
+    Args:
+        etf_code (str): ETF code
+        with_plots (bool): Whether today's charts are needed as well
+        
+    Returns:
+        dict: Signal information, or None if the ETF could not be processed
+    """
+    today = _today()
+    signal_info = _load_fresh_signal(etf_code, today, with_plots)
+    if signal_info is not None:
+        return signal_info
+    
+    from etf_tracker.main import process_etf
+    _, signal_info, _ = process_etf(etf_code, save_data=True, generate_plots=with_plots)
+    return signal_info
+
+def _latest_report(etf_code):
+    """
+    Find the most recent saved report whose charts are still on disk, however old
+    
+    Args:
+        etf_code (str): ETF code
+        
+    Returns:
+        tuple: (report date, signal info), or None if the ETF has no saved report
+    """
+    # Dates sort correctly as YYYY-MM-DD strings
+    for path in sorted(REPORTS_DIR.glob(f"{etf_code}_signal_*.json"), reverse=True):
+        report_date = path.stem.rsplit('_', 1)[-1]
+        signal_info = _load_fresh_signal(etf_code, report_date, with_plots=True, ttl=float('inf'))
+        if signal_info is not None:
+            return report_date, signal_info
+    return None
+
+def _regenerate_report(etf_code):
+    """Reprocess an ETF and render its charts, then clear its pending flag"""
+    from etf_tracker.main import process_etf
+    try:
+        process_etf(etf_code, save_data=True, generate_plots=True)
+    except Exception as e:
+        logger.error("Error regenerating report for %s: %s", etf_code, e)
+    finally:
+        with _pending_lock:
+            _pending.discard(etf_code)
+
+def schedule_report(etf_code):
+    """
+    Queue a background report regeneration unless one is already pending
+    
+    Args:
+        etf_code (str): ETF code
+        
+    Returns:
+        bool: True if a new job was queued
+    """
+    with _pending_lock:
+        if etf_code in _pending:
+            return False
+        _pending.add(etf_code)
+    PLOT_EXECUTOR.submit(_regenerate_report, etf_code)
+    return True
+
 @app.route('/')
 def index():
     """Landing page showing links to all supported ETFs"""
+    from etf_tracker.data_fetcher import get_supported_etfs
     supported_etfs = get_supported_etfs()
-    return render_template('index.html', etfs=supported_etfs, now=datetime.now())
+    return render_template('index.html', etfs=supported_etfs, today=_today())
 
 @app.route('/etf/<etf_code>')
 def etf_report(etf_code):
     """Generate and display ETF report"""
+    from etf_tracker.data_fetcher import is_supported_etf
     try:
         # Check if the ETF code is supported
-        supported_etfs = get_supported_etfs()
-        if etf_code not in supported_etfs:
+        if not is_supported_etf(etf_code):
             abort(404, description=f"ETF code {etf_code} not supported")
         
-        # Process ETF data
-        data, signal_info, image_path = process_etf(etf_code, save_data=True, generate_plots=True)
+        # Use today's report if it is still fresh; otherwise serve the last
+        # report while a fresh one renders in the background
+        report_date = _today()
+        chart_status = 'fresh'
+        signal_info = _load_fresh_signal(etf_code, report_date, with_plots=True)
+        if signal_info is None:
+            latest = _latest_report(etf_code)
+            if latest is not None:
+                report_date, signal_info = latest
+                chart_status = 'regenerating'
+                schedule_report(etf_code)
+            else:
+                # Nothing saved to fall back on, so render it now
+                signal_info = get_signal_info(etf_code, with_plots=True)
         
-        if data is None or signal_info is None:
+        if signal_info is None:
             abort(500, description=f"Failed to process ETF {etf_code}")
         
         # Get paths to image files
-        today = datetime.now().strftime('%Y-%m-%d')
-        summary_chart_path = f"/static/{etf_code}_summary_{today}.png"
-        technical_chart_path = f"/static/{etf_code}_technical_{today}.png"
-        
-        # Add change_percent if missing
-        if 'change_percent' not in signal_info:
-            # Try to calculate from data if available
-            if data is not None and len(data) > 1:
-                try:
-                    current_close = data['Close'].iloc[-1]
-                    prev_close = data['Close'].iloc[-2]
-                    change_percent = ((current_close / prev_close) - 1) * 100
-                    signal_info['change_percent'] = change_percent
-                except Exception as e:
-                    logger.warning(f"Could not calculate change_percent: {e}")
-                    signal_info['change_percent'] = 0.0
-            else:
-                # Default value if no data
-                signal_info['change_percent'] = 0.0
+        summary_chart_path = f"/static/{etf_code}_summary_{report_date}.png"
+        technical_chart_path = f"/static/{etf_code}_technical_{report_date}.png"
         
         # Ensure all values are the correct type
-        try:
-            # Convert values to appropriate types to avoid comparison issues
-            change_percent = float(signal_info['change_percent'])
-            close_price = float(signal_info['close'])
-            volume = int(signal_info.get('volume', 0))
-            k_value = float(signal_info['k_value'])
-            d_value = float(signal_info['d_value'])
-            macd = float(signal_info['macd'])
-            macd_signal = float(signal_info['macd_signal'])
-            rsi = float(signal_info['rsi'])
-        except (ValueError, TypeError) as e:
-            logger.error(f"Error converting signal values: {e}")
-            # Provide default values for any conversion errors
-            if 'change_percent' not in locals(): change_percent = 0.0
-            if 'close_price' not in locals(): close_price = 0.0
-            if 'volume' not in locals(): volume = 0
-            if 'k_value' not in locals(): k_value = 0.0
-            if 'd_value' not in locals(): d_value = 0.0
-            if 'macd' not in locals(): macd = 0.0
-            if 'macd_signal' not in locals(): macd_signal = 0.0
-            if 'rsi' not in locals(): rsi = 0.0
+        values = coerce_signal_info(signal_info)
         
         # Prepare template context
         context = {
             'etf_code': etf_code,
-            'report_date': today,
-            'price': f"{close_price:.2f}",
-            'change_percent': change_percent,  # Numeric for comparison
-            'change_percent_fmt': f"{change_percent:.2f}",  # Formatted for display
-            'volume': f"{volume:,}",
+            'report_date': report_date,
+            'price': f"{values['close']:.2f}",
+            'change_percent': values['change_percent'],  # Numeric for comparison
+            'change_percent_fmt': f"{values['change_percent']:.2f}",  # Formatted for display
+            'volume': f"{values['volume']:,}",
             'signal': signal_info['signal'],
-            'k_value': f"{k_value:.2f}",
-            'd_value': f"{d_value:.2f}",
-            'macd': f"{macd:.3f}",
-            'macd_signal': f"{macd_signal:.3f}",
-            'rsi': f"{rsi:.2f}",
+            'k_value': f"{values['k_value']:.2f}",
+            'd_value': f"{values['d_value']:.2f}",
+            'macd': f"{values['macd']:.3f}",
+            'macd_signal': f"{values['macd_signal']:.3f}",
+            'rsi': f"{values['rsi']:.2f}",
             'summary_chart_path': summary_chart_path,
             'technical_chart_path': technical_chart_path,
-            'current_year': datetime.now().year
+            'current_year': _today()[:4]
         }
         
-        # Render template
-        return render_template('report_template.html', **context)
+        # Render template; X-Chart-Status tells clients whether newer charts are on the way
+        response = make_response(render_template('report_template.html', **context))
+        response.headers['X-Chart-Status'] = chart_status
+        return response
     
     except Exception as e:
-        logger.error(f"Error generating report for {etf_code}: {e}")
+        logger.error("Error generating report for %s: %s", etf_code, e)
         abort(500, description=f"Internal server error: {str(e)}")
 
-@app.route('/static/<path:filename>')
-def serve_static(filename):
-    """Serve static files from the reports directory"""
-    return send_from_directory(app.static_folder, filename)
-
 @app.route('/api/etfs')
 def api_etfs():
     """API endpoint to get list of supported ETFs"""
+    from etf_tracker.data_fetcher import get_supported_etfs
     return {'etfs': get_supported_etfs()}
 
+@app.route('/api/etfs/refresh', methods=['POST'])
+def api_refresh_etfs():
+    """API endpoint to queue ETF reprocessing (all supported ETFs unless ?etfs= is given)"""
+    token = request.headers.get('X-Refresh-Token', '')
+    if not REFRESH_TOKEN or not hmac.compare_digest(token.encode(), REFRESH_TOKEN.encode()):
+        return {'error': 'Forbidden'}, 403
+    
+    from etf_tracker.data_fetcher import get_supported_etfs, is_supported_etf
+    requested = request.args.get('etfs')
+    etf_codes = [code.strip() for code in requested.split(',') if code.strip()] if requested else get_supported_etfs()
+    
+    unsupported = [code for code in etf_codes if not is_supported_etf(code)]
+    if unsupported:
+        return {'error': f"ETF codes not supported: {', '.join(unsupported)}"}, 400
+    
+    # Reprocessing runs on the background executor; ETFs already queued are not queued twice
+    queued = [code for code in etf_codes if schedule_report(code)]
+    pending = [code for code in etf_codes if code not in queued]
+    return {'queued': queued, 'pending': pending}, 202
+
 @app.route('/api/etf/<etf_code>')
 def api_etf_data(etf_code):
     """API endpoint to get ETF data"""
     try:
-        # Check if signal data exists for today
-        today = datetime.now().strftime('%Y-%m-%d')
-        signal_file = REPORTS_DIR / f"{etf_code}_signal_{today}.json"
+        signal_info = get_signal_info(etf_code)
         
-        # If we don't have today's data, process it
-        if not signal_file.exists():
-            data, signal_info, _ = process_etf(etf_code)
-        else:
-            # Load existing signal data
-            with open(signal_file, 'r') as f:
-                signal_info = json.load(f)
-                
-            # Re-process data to get DataFrame if needed
-            if 'change_percent' not in signal_info:
-                data, _, _ = process_etf(etf_code, save_data=False, generate_plots=False)
-                
-                # Calculate change_percent
-                if data is not None and len(data) > 1:
-                    try:
-                        current_close = data['Close'].iloc[-1]
-                        prev_close = data['Close'].iloc[-2]
-                        change_percent = ((current_close / prev_close) - 1) * 100
-                        signal_info['change_percent'] = change_percent
-                    except Exception as e:
-                        logger.warning(f"Could not calculate change_percent: {e}")
-                        signal_info['change_percent'] = 0.0
-                else:
-                    # Default value if no data
-                    signal_info['change_percent'] = 0.0
+        if signal_info is None:
+            return {'error': f"Failed to process ETF {etf_code}"}, 500
         
-        # Ensure volume is present
-        if 'volume' not in signal_info:
-            signal_info['volume'] = 0
-            
-        # Ensure all numeric values are actually numeric (for JSON serialization)
-        numeric_fields = ['close', 'change_percent', 'k_value', 'd_value', 'macd', 'macd_signal', 'rsi', 'volume']
-        for field in numeric_fields:
-            if field in signal_info:
-                try:
-                    # Convert to the appropriate numeric type
-                    signal_info[field] = float(signal_info[field])
-                    # For volume specifically, convert to int
-                    if field == 'volume':
-                        signal_info[field] = int(signal_info[field])
-                except (ValueError, TypeError):
-                    # Use appropriate defaults for each field
-                    if field == 'volume':
-                        signal_info[field] = 0
-                    else:
-                        signal_info[field] = 0.0
-                
-        return signal_info
+        # Ensure all numeric values are present and numeric (for JSON serialization)
+        return coerce_signal_info(signal_info)
     
     except Exception as e:
-        logger.error(f"Error fetching API data for {etf_code}: {e}")
+        logger.error("Error fetching API data for %s: %s", etf_code, e)
         return {'error': str(e)}, 500
 
 @app.errorhandler(404)
@@ -218,7 +384,7 @@ if __name__ == '__main__':
     # Use environment variable for port if set, otherwise use command line arg
     port = int(os.environ.get('PORT', args.port))
     
-    # In production, you'll want to use a proper WSGI server like gunicorn
+    # Development server only; in production run: gunicorn -c gunicorn.conf.py web_server:application
     debug = args.debug or os.environ.get('FLASK_ENV') == 'development'
     
     print(f"Starting ETF Tracker Web Server on port {port}")